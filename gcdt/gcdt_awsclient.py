@@ -4,10 +4,15 @@ This module abstracts the botocore session and clients
 to provide a simpler interface.
 """
 from __future__ import unicode_literals, print_function
+import threading
+
 from botocore.exceptions import ClientError  # used in plugins -> keep!!
 
 from . import __version__
 
+# creating clients from a botocore session is not thread-safe
+_client_lock = threading.Lock()
+
 
 class AWSClient(object):
     # note this is heavily inspired by TypedAWSClient:
@@ -22,9 +27,11 @@ class AWSClient(object):
             # use the region from the session
             region_name = self._session.get_config_variable('region')
 
-        if (service_name, region_name) not in self._client_cache:
-            self._client_cache[(service_name, region_name)] = \
-                self._session.create_client(service_name, region_name, **kwargs)
+        with _client_lock:
+            if (service_name, region_name) not in self._client_cache:
+                self._client_cache[(service_name, region_name)] = \
+                    self._session.create_client(service_name, region_name,
+                                                **kwargs)
         return self._client_cache[(service_name, region_name)]
 
     def get_region(self):
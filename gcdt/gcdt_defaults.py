@@ -33,7 +33,35 @@ DEFAULT_CONFIG = {
         'log_group': '/var/log/messages'  # conf from baseami (glomex specific)
     },
     'kumo': {
-        'non_config_commands': ['start', 'stop', 'list']  # this commands do not require config
+        'non_config_commands': ['start', 'stop', 'list', 'deploy-multi'],  # this commands do not require config
+        # polling while waiting for resources to start / stop (seconds)
+        'resource_polling': {
+            'min_interval': 5,
+            'max_interval': 30,
+            'backoff': 1.5,
+            'jitter': 0.1,
+            'timeout': 3600
+        },
+        # max. number of stacks deployed at the same time (deploy-multi)
+        'deploy_concurrency': 4,
+        # cache for rendered templates ('templateCache' in the 'stack' section)
+        'template_cache': True,
+        'template_cache_dir': '.gcdt/kumo',
+        'template_cache_size': 20,
+        # polling of stack events (seconds), can be overridden via
+        # 'eventPolling' in the 'stack' section of the kumo config
+        'event_polling': {
+            'min_interval': 1,
+            'max_interval': 10,
+            'backoff': 1.5
+        },
+        # polling while a change set is created (seconds)
+        'change_set_polling': {
+            'min_interval': 1,
+            'max_interval': 8,
+            'backoff': 2,
+            'jitter': 0.25
+        }
     }
 }
 
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
 import os
+import hashlib
+import io
 import six
 import imp
 import inspect
@@ -8,27 +10,66 @@ import json
 import random
 import string
 import sys
-import time
+from collections import OrderedDict
+from tempfile import NamedTemporaryFile
 
+from botocore.exceptions import ClientError
 from clint.textui import colored
 from funcsigs import signature  # python3 only: from inspect import signature
 from tabulate import tabulate
 
+from . import __version__
 from .gcdt_logging import getLogger
 from .utils import GracefulExit, json2table, dict_selective_merge, all_pages, \
-    get_env
+    get_env, AdaptiveInterval, BoundedSet
+from .gcdt_defaults import DEFAULT_CONFIG
 from .gcdt_signals import check_hook_mechanism_is_intact, \
     check_register_present
-from .s3 import upload_file_to_s3
+from .s3 import upload_file_to_s3, object_exists
 
 
 log = getLogger(__name__)
 
-
-def load_cloudformation_template(path=None):
+# rendered templates of the current run (by cache key)
+_template_cache = {}
+
+FINISHED_STATUSES = ['CREATE_COMPLETE',
+                     'CREATE_FAILED',
+                     'DELETE_COMPLETE',
+                     'DELETE_FAILED',
+                     'ROLLBACK_COMPLETE',
+                     'ROLLBACK_FAILED',
+                     'UPDATE_COMPLETE',
+                     'UPDATE_ROLLBACK_COMPLETE',
+                     'UPDATE_ROLLBACK_FAILED']
+
+FAILED_STATUSES = ['CREATE_FAILED',
+                   'DELETE_FAILED',
+                   'ROLLBACK_COMPLETE',
+                   'ROLLBACK_FAILED',
+                   'UPDATE_ROLLBACK_COMPLETE',
+                   'UPDATE_ROLLBACK_FAILED']
+
+WARNING_STATUSES = ['ROLLBACK_IN_PROGRESS',
+                    'UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS',
+                    'UPDATE_ROLLBACK_IN_PROGRESS']
+
+SUCCESS_STATUSES = ['CREATE_COMPLETE',
+                    'DELETE_COMPLETE',
+                    'UPDATE_COMPLETE']
+
+# stack states in which an unchanged deployment can be skipped
+NOOP_STATUSES = ['CREATE_COMPLETE',
+                 'UPDATE_COMPLETE',
+                 'UPDATE_ROLLBACK_COMPLETE']
+
+
+def load_cloudformation_template(path=None, module_name='cloudformation'):
     """Load cloudformation template from path.
 
     :param path: Absolute or relative path of cloudformation template. Defaults to cwd.
+    :param module_name: name of the module (use distinct names to load
+        multiple templates)
     :return: module, success
     """
     if not path:
@@ -40,7 +81,7 @@ def load_cloudformation_template(path=None):
             sp = sys.path
             # temporarily add folder to allow relative path
             sys.path.append(os.path.abspath(os.path.dirname(path)))
-            cloudformation = imp.load_source('cloudformation', path)
+            cloudformation = imp.load_source(module_name, path)
             sys.path = sp  # restore
             # use cfn template hooks
             if not check_hook_mechanism_is_intact(cloudformation):
@@ -64,18 +105,83 @@ def load_cloudformation_template(path=None):
     return None, False
 
 
-def get_parameter_diff(awsclient, config):
+class StackSnapshot(object):
+    """Snapshot of a stack as returned by `describe_stacks`.
+    The stack is described once and then shared by all functions of a
+    lifecycle phase. Call `invalidate` after create / update / delete so the
+    next access reads the current state.
+    """
+    def __init__(self, awsclient, stack_name):
+        self._awsclient = awsclient
+        self.stack_name = stack_name
+        self._stack = None
+        self._fetched = False
+
+    def invalidate(self):
+        self._stack = None
+        self._fetched = False
+
+    @property
+    def stack(self):
+        """Stack description (None if the stack does not exist)."""
+        if not self._fetched:
+            client_cf = self._awsclient.get_client('cloudformation')
+            try:
+                response = client_cf.describe_stacks(
+                    StackName=self.stack_name)
+                self._stack = response['Stacks'][0] \
+                    if response['Stacks'] else None
+            except ClientError as e:
+                if 'does not exist' not in str(e):
+                    raise
+                self._stack = None
+            self._fetched = True
+        return self._stack
+
+    @property
+    def exists(self):
+        return self.stack is not None
+
+    @property
+    def stack_id(self):
+        if self.exists:
+            return self.stack['StackId']
+
+    @property
+    def outputs(self):
+        if self.exists:
+            return self.stack.get('Outputs')
+
+    @property
+    def state(self):
+        if self.exists:
+            return self.stack['StackStatus']
+
+    @property
+    def parameters(self):
+        if self.exists:
+            return self.stack.get('Parameters', [])
+
+
+def _get_snapshot(awsclient, stack_name, snapshot=None):
+    # helper to use the snapshot of the current lifecycle phase if we have one
+    if snapshot is None:
+        snapshot = StackSnapshot(awsclient, stack_name)
+    return snapshot
+
+
+def get_parameter_diff(awsclient, config, snapshot=None):
     """get differences between local config and currently active config
+
+    :param awsclient:
+    :param config:
+    :param snapshot: StackSnapshot of the current lifecycle phase (optional)
     """
-    client_cf = awsclient.get_client('cloudformation')
     try:
         stack_name = config['stack']['StackName']
         if stack_name:
-            response = client_cf.describe_stacks(StackName=stack_name)
-            if response['Stacks']:
-                stack_id = response['Stacks'][0]['StackId']
-                stack = response['Stacks'][0]
-            else:
+            stack = _get_snapshot(awsclient, stack_name, snapshot).stack
+            if stack is None:
                 return None
         else:
             print(
@@ -140,7 +246,7 @@ def call_pre_hook(awsclient, cloudformation):
 
 
 def _call_hook(awsclient, config, stack_name, parameters, cloudformation,
-               hook, message=None):
+               hook, message=None, snapshot=None):
     # TODO: this is deprecated!! move this to glomex_config_reader
     if hook not in ['pre_hook', 'pre_create_hook', 'pre_update_hook',
                     'post_create_hook', 'post_update_hook', 'post_hook']:
@@ -161,15 +267,17 @@ def _call_hook(awsclient, config, stack_name, parameters, cloudformation,
         hook_func()  # for compatibility with existing templates
     else:
         # new call for templates with parametrized hooks
-        client_cf = awsclient.get_client('cloudformation')
-        stack_outputs = _get_stack_outputs(client_cf, stack_name)
-        stack_state = _get_stack_state(client_cf, stack_name)
+        snapshot = _get_snapshot(awsclient, stack_name, snapshot)
+        stack_outputs = snapshot.outputs
+        stack_state = snapshot.state
         hook_func(awsclient=awsclient, config=config,
                   parameters=parameters, stack_outputs=stack_outputs,
                   stack_state=stack_state)
 
 
-def _get_stack_outputs(cfn_client, stack_name):
+def _get_stack_outputs(cfn_client, stack_name, snapshot=None):
+    if snapshot is not None:
+        return snapshot.outputs
     response = cfn_client.describe_stacks(StackName=stack_name)
     if response['Stacks']:
         stack = response['Stacks'][0]
@@ -177,8 +285,10 @@ def _get_stack_outputs(cfn_client, stack_name):
             return stack['Outputs']
 
 
-def _get_stack_state(client_cf, stack_name):
+def _get_stack_state(client_cf, stack_name, snapshot=None):
     try:
+        if snapshot is not None:
+            return snapshot.state
         response = client_cf.describe_stacks(StackName=stack_name)
         if response['Stacks']:
             stack = response['Stacks'][0]
@@ -190,86 +300,137 @@ def _get_stack_state(client_cf, stack_name):
         return
 
 
-def get_stack_id(awsclient, stack_name):
+def get_stack_id(awsclient, stack_name, snapshot=None):
+    if snapshot is not None:
+        return snapshot.stack_id
     client = awsclient.get_client('cloudformation')
     response = client.describe_stacks(StackName=stack_name)
     stack_id = response['Stacks'][0]['StackId']
     return stack_id
 
 
-def _get_stack_events_last_timestamp(awsclient, stack_name):
+def _get_stack_events_last_timestamp(awsclient, stack_name, snapshot=None):
     # we need to get the last event since updatedTime is when the update stated
     client = awsclient.get_client('cloudformation')
-    stack_id = get_stack_id(awsclient, stack_name)
+    stack_id = get_stack_id(awsclient, stack_name, snapshot)
     response = client.describe_stack_events(StackName=stack_id)
-    return response['StackEvents'][-1]['Timestamp']
+    # events are ordered newest first
+    return response['StackEvents'][0]['Timestamp']
+
+
+def _get_event_poll_interval(conf, context=None):
+    """Create the interval policy for polling stack events.
+    Defaults can be overridden via 'eventPolling' in the 'stack' section of
+    the config: {"minInterval": 1, "maxInterval": 10, "backoff": 1.5}
 
+    :param conf: kumo config
+    :param context: a '_poll_interval' in the context is used instead
+    :return: AdaptiveInterval
+    """
+    if context and context.get('_poll_interval'):
+        return context['_poll_interval']
+    polling = dict(DEFAULT_CONFIG['kumo']['event_polling'])
+    custom = conf.get('stack', {}).get('eventPolling', {})
+    for key, conf_key in [('min_interval', 'minInterval'),
+                          ('max_interval', 'maxInterval'),
+                          ('backoff', 'backoff')]:
+        if conf_key in custom:
+            polling[key] = float(custom[conf_key])
+    return AdaptiveInterval(**polling)
+
+
+def _get_new_stack_events(client_cf, stack_id, seen_events, last_event=None):
+    """Read the stack events which have not been seen yet.
+    Pages are followed (NextToken) until we reach an event we have already
+    seen or which is older than last_event.
+
+    :param client_cf: cloudformation client
+    :param stack_id:
+    :param seen_events: ids of the events we have already seen
+    :param last_event: timestamp, ignore events up to this point in time
+    :return: list of new events (oldest first)
+    """
+    new_events = []
+    request = {'StackName': stack_id}
+    while True:
+        response = client_cf.describe_stack_events(**request)
+        reached_seen = False
+        for event in response['StackEvents']:  # newest first
+            if event['EventId'] in seen_events or \
+                    (last_event and event['Timestamp'] <= last_event):
+                reached_seen = True
+                break
+            new_events.append(event)
+        if reached_seen or 'NextToken' not in response:
+            break
+        request['NextToken'] = response['NextToken']
+    new_events.reverse()
+    for event in new_events:
+        seen_events.add(event['EventId'])
+    return new_events
+
+
+def stream_stack_events(awsclient, stack_id, stack_name, last_event=None,
+                        poll_interval=None):
+    """Generator for the events of a stack operation (create, update, delete).
+    The stream ends once the stack reached a finished status.
 
-def _poll_stack_events(awsclient, stack_name, last_event=None):
+    :param awsclient:
+    :param stack_id: the stack_id is required to follow deleted stacks
+    :param stack_name:
+    :param last_event: timestamp, ignore events up to this point in time
+    :param poll_interval: AdaptiveInterval to control the polling
+    :return: stack events (oldest first)
+    """
+    client_cf = awsclient.get_client('cloudformation')
+    if poll_interval is None:
+        poll_interval = AdaptiveInterval(
+            **DEFAULT_CONFIG['kumo']['event_polling'])
+    seen_events = BoundedSet()
+    while True:
+        events = _get_new_stack_events(client_cf, stack_id, seen_events,
+                                       last_event)
+        for event in events:
+            yield event
+            if event['LogicalResourceId'] == stack_name and \
+                    event['ResourceStatus'] in FINISHED_STATUSES:
+                return
+        poll_interval.sleep(active=bool(events))
+
+
+def _print_stack_event(event, prefix=''):
+    resource_status = event['ResourceStatus']
+    # this is not always present
+    reason = event.get('ResourceStatusReason', '')
+    message = '%s%-50s %-25s %-50s %-25s\n' % (
+        prefix, resource_status, event['LogicalResourceId'],
+        reason, str(event['Timestamp']))
+    if resource_status in FAILED_STATUSES:
+        print(colored.red(message))
+    elif resource_status in WARNING_STATUSES:
+        print(colored.yellow(message))
+    elif resource_status in SUCCESS_STATUSES:
+        print(colored.green(message))
+    else:
+        print(message)
+
+
+def _poll_stack_events(awsclient, stack_name, last_event=None,
+                       poll_interval=None, snapshot=None, prefix=''):
     # http://stackoverflow.com/questions/796008/cant-subtract-offset-naive-and-offset-aware-datetimes/25662061#25662061
-    finished_statuses = ['CREATE_COMPLETE',
-                         'CREATE_FAILED',
-                         'DELETE_COMPLETE',
-                         'DELETE_FAILED',
-                         'ROLLBACK_COMPLETE',
-                         'ROLLBACK_FAILED',
-                         'UPDATE_COMPLETE',
-                         'UPDATE_ROLLBACK_COMPLETE',
-                         'UPDATE_ROLLBACK_FAILED']
-
-    failed_statuses = ['CREATE_FAILED',
-                       'DELETE_FAILED',
-                       'ROLLBACK_COMPLETE',
-                       'ROLLBACK_FAILED',
-                       'UPDATE_ROLLBACK_COMPLETE',
-                       'UPDATE_ROLLBACK_FAILED']
-
-    warning_statuses = ['ROLLBACK_IN_PROGRESS',
-                        'UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS',
-                        'UPDATE_ROLLBACK_IN_PROGRESS']
-
-    success_statuses = ['CREATE_COMPLETE',
-                        'DELETE_COMPLETE',
-                        'UPDATE_COMPLETE']
-
-    seen_events = []
-    # print len(seen_events)
-    client = awsclient.get_client('cloudformation')
     status = ''
     # for the delete command we need the stack_id
-    stack_id = get_stack_id(awsclient, stack_name)
-    print('%-50s %-25s %-50s %-25s\n' % ('Resource Status', 'Resource ID',
-                                         'Reason', 'Timestamp'))
-    while status not in finished_statuses:
-        response = client.describe_stack_events(StackName=stack_id)
-        for event in response['StackEvents'][::-1]:
-            if event['EventId'] not in seen_events and \
-                    (not last_event or event['Timestamp'] > last_event):
-                seen_events.append(event['EventId'])
-                resource_status = event['ResourceStatus']
-                resource_id = event['LogicalResourceId']
-                # this is not always present
-                try:
-                    reason = event['ResourceStatusReason']
-                except KeyError:
-                    reason = ''
-                timestamp = str(event['Timestamp'])
-                message = '%-50s %-25s %-50s %-25s\n' % (
-                    resource_status, resource_id,
-                    reason, timestamp)
-                if resource_status in failed_statuses:
-                    print(colored.red(message))
-                elif resource_status in warning_statuses:
-                    print(colored.yellow(message))
-                elif resource_status in success_statuses:
-                    print(colored.green(message))
-                else:
-                    print(message)
-                if event['LogicalResourceId'] == stack_name:
-                    status = event['ResourceStatus']
-        time.sleep(5)
+    stack_id = get_stack_id(awsclient, stack_name, snapshot)
+    print('%s%-50s %-25s %-50s %-25s\n' % (prefix, 'Resource Status',
+                                           'Resource ID', 'Reason',
+                                           'Timestamp'))
+    for event in stream_stack_events(awsclient, stack_id, stack_name,
+                                     last_event, poll_interval):
+        _print_stack_event(event, prefix)
+        if event['LogicalResourceId'] == stack_name:
+            status = event['ResourceStatus']
     exit_code = 0
-    if status not in success_statuses:
+    if status not in SUCCESS_STATUSES:
         exit_code = 1
     return exit_code
 
@@ -304,43 +465,43 @@ def _generate_parameters(conf):
     return parameter_list
 
 
-def stack_exists(awsclient, stack_name):
+def stack_exists(awsclient, stack_name, snapshot=None):
     # TODO handle failure based on API call limit
-    client = awsclient.get_client('cloudformation')
     try:
-        response = client.describe_stacks(
-            StackName=stack_name
-        )
+        return _get_snapshot(awsclient, stack_name, snapshot).exists
     except GracefulExit:
         raise
     except Exception:
         return False
-    else:
-        return True
 
 
-def deploy_stack(awsclient, context, conf, cloudformation, override_stack_policy=False):
+def deploy_stack(awsclient, context, conf, cloudformation,
+                 override_stack_policy=False, snapshot=None):
     """Deploy the stack to AWS cloud. Does either create or update the stack.
 
     :param conf:
     :param override_stack_policy:
+    :param snapshot: StackSnapshot of the current lifecycle phase (optional)
     :return: exit_code
     """
     stack_name = _get_stack_name(conf)
     parameters = _generate_parameters(conf)
-    if stack_exists(awsclient, stack_name):
+    snapshot = _get_snapshot(awsclient, stack_name, snapshot)
+    if stack_exists(awsclient, stack_name, snapshot):
         exit_code = _update_stack(awsclient, context, conf, cloudformation,
-                                  parameters, override_stack_policy)
+                                  parameters, override_stack_policy,
+                                  snapshot=snapshot)
     else:
         exit_code = _create_stack(awsclient, context, conf, cloudformation,
-                                  parameters)
+                                  parameters, snapshot=snapshot)
     # add 'stack_output' to the context so it becomes available
     # in 'command_finalized' hook
     context['stack_output'] = _get_stack_outputs(
-        awsclient.get_client('cloudformation'), stack_name)
+        awsclient.get_client('cloudformation'), stack_name, snapshot)
     _call_hook(awsclient, conf, stack_name, parameters, cloudformation,
                hook='post_hook',
-               message='CloudFormation is done, now executing post hook...')
+               message='CloudFormation is done, now executing post hook...',
+               snapshot=snapshot)
     return exit_code
 
 
@@ -414,13 +575,15 @@ def _get_stack_policy_during_update(cloudformation, override_stack_policy):
     return stack_policy_during_update
 
 
-def _create_stack(awsclient, context, conf, cloudformation, parameters):
+def _create_stack(awsclient, context, conf, cloudformation, parameters,
+                  snapshot=None):
     # create stack with all the information we have
     client_cf = awsclient.get_client('cloudformation')
     stack_name = _get_stack_name(conf)
+    snapshot = _get_snapshot(awsclient, stack_name, snapshot)
 
     _call_hook(awsclient, conf, stack_name, parameters, cloudformation,
-               hook='pre_create_hook')
+               hook='pre_create_hook', snapshot=snapshot)
 
     request = {
         'Parameters': parameters,
@@ -437,11 +600,18 @@ def _create_stack(awsclient, context, conf, cloudformation, parameters):
         request['TemplateBody'] = generate_template(context, conf, cloudformation)
 
     response = client_cf.create_stack(**request)
-
-    exit_code = _poll_stack_events(awsclient, stack_name)
+    snapshot.invalidate()
+
+    exit_code = _poll_stack_events(awsclient, stack_name,
+                                   poll_interval=_get_event_poll_interval(
+                                       conf, context),
+                                   snapshot=snapshot,
+                                   prefix=context.get('_event_prefix', ''))
+    snapshot.invalidate()
     _call_hook(awsclient, conf, stack_name, parameters, cloudformation,
                hook='post_create_hook',
-               message='CloudFormation is done, now executing post create hook...')
+               message='CloudFormation is done, now executing post create hook...',
+               snapshot=snapshot)
     return exit_code
 
 
@@ -454,27 +624,110 @@ def wait_for_stack_create_complete(awsclient, stack_id):
 
 
 def _s3_upload(awsclient, conf, template_body):
+    # the artifact key is content-addressed so we only upload a template
+    # if exactly this template has not been uploaded before
     region = awsclient.get_client('s3').meta.region_name
     bucket = _get_artifact_bucket(conf)
-    dest_key = 'kumo/%s/%s-cloudformation.json' % (
-        region, _get_stack_name(conf))
-    source_file = write_template_to_file(conf, template_body)
-    upload_file_to_s3(awsclient, bucket, dest_key, source_file)
+    dest_key = 'kumo/%s/%s-%s-cloudformation.json' % (
+        region, _get_stack_name(conf), _get_digest(template_body))
+    if object_exists(awsclient, bucket, dest_key):
+        log.debug('template already uploaded to s3://%s/%s', bucket, dest_key)
+    else:
+        source_file = write_template_to_file(conf, template_body)
+        upload_file_to_s3(awsclient, bucket, dest_key, source_file)
     s3url = 'https://s3-%s.amazonaws.com/%s/%s' % (region, bucket, dest_key)
     return s3url
 
 
+def _get_digest(body):
+    if isinstance(body, six.text_type):
+        body = body.encode('utf-8')
+    return hashlib.sha256(body).hexdigest()
+
+
+def _load_json(body):
+    # the API returns json documents either as string or as parsed dict
+    if body is None or isinstance(body, dict):
+        return body
+    return json.loads(body)
+
+
+def get_template_fingerprint(template_body):
+    """Fingerprint of a template which does not depend on formatting or
+    on the order of keys.
+
+    :param template_body: template as json string or dict
+    :return: sha256 hexdigest
+    """
+    return _get_digest(json.dumps(_load_json(template_body), sort_keys=True,
+                                  separators=(',', ':')))
+
+
+def _resolve_parameters(template, parameters):
+    # the parameter values the stack gets (including template defaults)
+    resolved = {}
+    for key, param in template.get('Parameters', {}).items():
+        if 'Default' in param:
+            resolved[key] = str(param['Default'])
+    for param in parameters:
+        resolved[param['ParameterKey']] = str(param['ParameterValue'])
+    return resolved
+
+
+def _is_stack_up_to_date(awsclient, conf, cloudformation, template_body,
+                         parameters, snapshot):
+    """Compare template, parameters, stack policy and stack settings with
+    the deployed stack.
+
+    :return: True if an update would not change anything
+    """
+    stack = snapshot.stack
+    if stack is None or stack['StackStatus'] not in NOOP_STATUSES:
+        return False
+
+    # cheap checks first (no additional API calls)
+    deployed_parameters = {p['ParameterKey']: p['ParameterValue']
+                           for p in stack.get('Parameters', [])}
+    if any(v.startswith('****') for v in deployed_parameters.values()):
+        # parameter is configured with `NoEcho=True` so we can not compare
+        return False
+    template = _load_json(template_body)
+    if _resolve_parameters(template, parameters) != deployed_parameters:
+        return False
+    if conf['stack'].get('RoleARN') != stack.get('RoleARN'):
+        return False
+    if sorted(conf['stack'].get('NotificationARNs', [])) != \
+            sorted(stack.get('NotificationARNs', [])):
+        return False
+
+    client_cf = awsclient.get_client('cloudformation')
+    stack_name = _get_stack_name(conf)
+    deployed_policy = client_cf.get_stack_policy(
+        StackName=stack_name).get('StackPolicyBody')
+    if _load_json(_get_stack_policy(cloudformation)) != \
+            _load_json(deployed_policy):
+        return False
+
+    deployed_template = client_cf.get_template(
+        StackName=stack_name)['TemplateBody']
+    fingerprint = get_template_fingerprint(template)
+    log.debug('template fingerprint: %s', fingerprint)
+    return fingerprint == get_template_fingerprint(deployed_template)
+
+
 def _update_stack(awsclient, context, conf, cloudformation, parameters,
-                  override_stack_policy):
+                  override_stack_policy, snapshot=None):
     # update stack with all the information we have
     exit_code = 0
     client_cf = awsclient.get_client('cloudformation')
     stack_name = _get_stack_name(conf)
-    last_event = _get_stack_events_last_timestamp(awsclient, stack_name)
+    snapshot = _get_snapshot(awsclient, stack_name, snapshot)
+    last_event = _get_stack_events_last_timestamp(awsclient, stack_name,
+                                                  snapshot)
 
     try:
         _call_hook(awsclient, conf, stack_name, parameters, cloudformation,
-                   hook='pre_update_hook')
+                   hook='pre_update_hook', snapshot=snapshot)
         request = {
             'Parameters': parameters,
             'Capabilities': ['CAPABILITY_IAM'],
@@ -487,19 +740,39 @@ def _update_stack(awsclient, context, conf, cloudformation, parameters,
         dict_selective_merge(request, conf['stack'],
                              ['StackName', 'RoleARN', 'NotificationARNs'])
 
+        template_body = generate_template(context, conf, cloudformation)
+        if not override_stack_policy:
+            try:
+                up_to_date = _is_stack_up_to_date(
+                    awsclient, conf, cloudformation, template_body,
+                    parameters, snapshot)
+            except GracefulExit:
+                raise
+            except Exception as e:
+                # we can not tell so we let cloudformation decide
+                log.debug('could not compare with deployed stack: %s', e)
+                up_to_date = False
+            if up_to_date:
+                print(colored.yellow('No updates are to be performed.'))
+                return exit_code
+
         if _get_artifact_bucket(conf):
-            request['TemplateURL'] = _s3_upload(
-                awsclient, conf, generate_template(context, conf, cloudformation))
+            request['TemplateURL'] = _s3_upload(awsclient, conf, template_body)
         else:
             # if we have no artifacts bucket configured then upload the template directly
-            request['TemplateBody'] = generate_template(context, conf, cloudformation)
+            request['TemplateBody'] = template_body
 
         response = client_cf.update_stack(**request)
 
-        exit_code = _poll_stack_events(awsclient, stack_name, last_event)
+        exit_code = _poll_stack_events(
+            awsclient, stack_name, last_event,
+            poll_interval=_get_event_poll_interval(conf, context),
+            snapshot=snapshot, prefix=context.get('_event_prefix', ''))
+        snapshot.invalidate()
         _call_hook(awsclient, conf, stack_name, parameters, cloudformation,
                    hook='post_update_hook',
-                   message='CloudFormation is done, now executing post update hook...')
+                   message='CloudFormation is done, now executing post update hook...',
+                   snapshot=snapshot)
     except GracefulExit as e:
         log.info('Received %s signal - cancel cloudformation update for \'%s\'',
                  str(e), stack_name)
@@ -523,16 +796,19 @@ def wait_for_stack_update_complete(awsclient, stack_id):
     waiter.wait(StackName=stack_id)
 
 
-def delete_stack(awsclient, conf, feedback=True):
+def delete_stack(awsclient, conf, feedback=True, snapshot=None):
     """Delete the stack from AWS cloud.
 
     :param awsclient:
     :param conf:
     :param feedback: print out stack events (defaults to True)
+    :param snapshot: StackSnapshot of the current lifecycle phase (optional)
     """
     client_cf = awsclient.get_client('cloudformation')
     stack_name = _get_stack_name(conf)
-    last_event = _get_stack_events_last_timestamp(awsclient, stack_name)
+    snapshot = _get_snapshot(awsclient, stack_name, snapshot)
+    last_event = _get_stack_events_last_timestamp(awsclient, stack_name,
+                                                  snapshot)
 
     request = {}
     dict_selective_merge(request, conf['stack'], ['StackName', 'RoleARN'])
@@ -540,7 +816,12 @@ def delete_stack(awsclient, conf, feedback=True):
     response = client_cf.delete_stack(**request)
 
     if feedback:
-        return _poll_stack_events(awsclient, stack_name, last_event)
+        exit_code = _poll_stack_events(
+            awsclient, stack_name, last_event,
+            poll_interval=_get_event_poll_interval(conf), snapshot=snapshot)
+        snapshot.invalidate()
+        return exit_code
+    snapshot.invalidate()
 
 
 def wait_for_stack_delete_complete(awsclient, stack_id):
@@ -580,13 +861,14 @@ def list_stacks(awsclient):
     print('listed %s stacks' % str(stack_sum))
 
 
-def create_change_set(awsclient, context, conf, cloudformation):
+def create_change_set(awsclient, context, conf, cloudformation,
+                      snapshot=None):
     client = awsclient.get_client('cloudformation')
     stack_name = _get_stack_name(conf)
     change_set_name = ''.join(random.SystemRandom().choice(
         string.ascii_uppercase) for _ in range(8))
 
-    if stack_exists(awsclient, stack_name):
+    if stack_exists(awsclient, stack_name, snapshot):
         change_set_type = 'UPDATE'
     else:
         change_set_type = 'CREATE'
@@ -602,31 +884,92 @@ def create_change_set(awsclient, context, conf, cloudformation):
                          ['StackName', 'RoleARN', 'NotificationARNs'])
 
     response = client.create_change_set(**request)
+    if snapshot is not None and change_set_type == 'CREATE':
+        # the stack now exists in 'REVIEW_IN_PROGRESS' state
+        snapshot.invalidate()
     return change_set_name, stack_name, change_set_type
 
 
-def describe_change_set(awsclient, change_set_name, stack_name):
-    """Print out the change_set to console.
-    This needs to run create_change_set first.
+def wait_for_change_set(awsclient, change_set_name, stack_name,
+                        poll_interval=None):
+    """Wait until the change set is created (or failed). The API is polled
+    with exponential backoff and jitter.
 
     :param awsclient:
     :param change_set_name:
     :param stack_name:
+    :param poll_interval: AdaptiveInterval to control the polling
+    :return: last describe_change_set response (first page of changes)
     """
     client = awsclient.get_client('cloudformation')
-
-    status = None
-    while status not in ['CREATE_COMPLETE', 'FAILED']:
+    if poll_interval is None:
+        poll_interval = AdaptiveInterval(
+            **DEFAULT_CONFIG['kumo']['change_set_polling'])
+    while True:
         response = client.describe_change_set(
             ChangeSetName=change_set_name,
             StackName=stack_name)
-        status = response['Status']
-        # print('##### %s' % status)
-        if status == 'FAILED':
-            print(response['StatusReason'])
-        elif status == 'CREATE_COMPLETE':
-            for change in response['Changes']:
-                print(json2table(change['ResourceChange']))
+        if response['Status'] in ['CREATE_COMPLETE', 'FAILED']:
+            return response
+        poll_interval.sleep()
+
+
+def _get_change_set_changes(client, change_set_name, stack_name, response):
+    # the first page of changes is contained in the response of the waiter
+    changes = list(response.get('Changes', []))
+    while response.get('NextToken'):
+        response = client.describe_change_set(
+            ChangeSetName=change_set_name,
+            StackName=stack_name,
+            NextToken=response['NextToken'])
+        changes.extend(response.get('Changes', []))
+    return changes
+
+
+def _get_resource_change(change):
+    # compact representation of a change
+    resource_change = change['ResourceChange']
+    return OrderedDict([
+        ('Action', resource_change.get('Action')),
+        ('LogicalResourceId', resource_change.get('LogicalResourceId')),
+        ('PhysicalResourceId', resource_change.get('PhysicalResourceId', '')),
+        ('ResourceType', resource_change.get('ResourceType')),
+        ('Replacement', resource_change.get('Replacement', '')),
+        ('Scope', resource_change.get('Scope', []))
+    ])
+
+
+def describe_change_set(awsclient, change_set_name, stack_name, format=None):
+    """Print out the change_set to console.
+    This needs to run create_change_set first.
+
+    :param awsclient:
+    :param change_set_name:
+    :param stack_name:
+    :param format: 'tabular' (default) or 'json'
+    :return: list of resource changes
+    """
+    if format is None:
+        format = 'tabular'
+    client = awsclient.get_client('cloudformation')
+
+    response = wait_for_change_set(awsclient, change_set_name, stack_name)
+    if response['Status'] == 'FAILED':
+        print(response['StatusReason'])
+        return []
+    changes = [_get_resource_change(change) for change in
+               _get_change_set_changes(client, change_set_name, stack_name,
+                                       response)]
+    if format == 'json':
+        print(json.dumps(changes, indent=2))
+    elif format == 'tabular':
+        print(tabulate([[c['Action'], c['LogicalResourceId'],
+                         c['PhysicalResourceId'], c['ResourceType'],
+                         c['Replacement'], ','.join(c['Scope'])]
+                        for c in changes],
+                       headers=list(changes[0].keys()) if changes else [],
+                       tablefmt='fancy_grid'))
+    return changes
 
 
 def delete_change_set(awsclient, change_set_name, stack_name):
@@ -668,12 +1011,39 @@ def write_template_to_file(conf, template_body):
 
 def generate_template(context, config, cloudformation):
     """call cloudformation to generate the template (json format).
+    Rendered templates are cached in memory and on disk (can be disabled
+    via 'templateCache' in the 'stack' section of the config).
 
     :param context:
     :param config:
     :param cloudformation:
     :return:
     """
+    key = None
+    if config.get('stack', {}).get(
+            'templateCache', DEFAULT_CONFIG['kumo']['template_cache']):
+        try:
+            key = _get_template_cache_key(context, config, cloudformation)
+        except GracefulExit:
+            raise
+        except Exception as e:
+            log.debug('template cache not available: %s', e)
+    if key is not None:
+        if key not in _template_cache:
+            _template_cache[key] = _read_cached_template(key)
+        if _template_cache[key] is not None:
+            log.debug('using cached template %s', key)
+            return _template_cache[key]
+
+    template_body = _render_template(context, config, cloudformation)
+
+    if key is not None and isinstance(template_body, six.string_types):
+        _template_cache[key] = template_body
+        _write_cached_template(key, template_body)
+    return template_body
+
+
+def _render_template(context, config, cloudformation):
     spec = inspect.getargspec(cloudformation.generate_template)[0]
     if len(spec) == 0:
         return cloudformation.generate_template()
@@ -683,6 +1053,92 @@ def generate_template(context, config, cloudformation):
         raise Exception('Arguments of \'generate_template\' not as expected: %s' % spec)
 
 
+def _get_source_file(module):
+    filename = os.path.abspath(module.__file__)
+    if filename.endswith(('.pyc', '.pyo')):
+        filename = filename[:-1]
+    return filename
+
+
+def _get_local_modules(template_dir):
+    # modules imported from the template folder (excluding installed ones)
+    local_modules = []
+    for module in list(sys.modules.values()):
+        filename = getattr(module, '__file__', None)
+        if not filename or 'site-packages' in filename:
+            continue
+        filename = _get_source_file(module)
+        if filename.startswith(template_dir + os.sep) and \
+                os.path.isfile(filename):
+            local_modules.append(filename)
+    return sorted(set(local_modules))
+
+
+def _get_template_cache_key(context, config, cloudformation):
+    """The key covers all inputs of the template generation: the template
+    source, modules imported from the template folder, config, ENV and
+    versions.
+
+    :return: sha256 hexdigest
+    """
+    template_file = _get_source_file(cloudformation)
+    hasher = hashlib.sha256()
+    for filename in [template_file] + \
+            _get_local_modules(os.path.dirname(template_file)):
+        hasher.update(filename.encode('utf-8'))
+        with open(filename, 'rb') as sfile:
+            hasher.update(sfile.read())
+    inputs = {
+        'config': config,
+        'env': get_env(),
+        'gcdt': __version__,
+        'troposphere': getattr(sys.modules.get('troposphere'),
+                               '__version__', None)
+    }
+    spec = inspect.getargspec(cloudformation.generate_template)[0]
+    if spec:
+        inputs['context'] = {k: v for k, v in context.items()
+                             if not k.startswith('_') and k != 'stack_output'}
+    hasher.update(json.dumps(inputs, sort_keys=True,
+                             default=str).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def _get_template_cache_file(key):
+    return os.path.join(DEFAULT_CONFIG['kumo']['template_cache_dir'],
+                        '%s.json' % key)
+
+
+def _read_cached_template(key):
+    filename = _get_template_cache_file(key)
+    if os.path.isfile(filename):
+        with io.open(filename, encoding='utf-8') as tfile:
+            return tfile.read()
+
+
+def _write_cached_template(key, template_body):
+    cache_dir = DEFAULT_CONFIG['kumo']['template_cache_dir']
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        if isinstance(template_body, six.text_type):
+            template_body = template_body.encode('utf-8')
+        # write to temp file and rename so readers never see partial files
+        with NamedTemporaryFile(dir=cache_dir, suffix='.tmp',
+                                delete=False) as tfile:
+            tfile.write(template_body)
+        os.rename(tfile.name, _get_template_cache_file(key))
+        # keep only the most recent templates
+        cached = sorted([os.path.join(cache_dir, f)
+                         for f in os.listdir(cache_dir)
+                         if f.endswith('.json')],
+                        key=os.path.getmtime, reverse=True)
+        for old in cached[DEFAULT_CONFIG['kumo']['template_cache_size']:]:
+            os.remove(old)
+    except (IOError, OSError) as e:
+        log.debug('could not write template cache: %s', e)
+
+
 def info(awsclient, config, format=None):
     """
     collect info and output to console
@@ -20,8 +20,10 @@ from . import utils
 from .kumo_core import get_parameter_diff, delete_stack, \
     deploy_stack, write_template_to_file, list_stacks, create_change_set, \
     describe_change_set, load_cloudformation_template, call_pre_hook, \
-    generate_template, info
+    generate_template, info, StackSnapshot
 from .kumo_start_stop import stop_stack, start_stack
+from .kumo_multistack import find_stack_dirs, read_stack, add_dependencies, \
+    deploy_stacks, print_results
 from .kumo_viz import cfn_viz, svg_output
 from .gcdt_cmd_dispatcher import cmd
 from . import gcdt_lifecycle
@@ -30,10 +32,11 @@ from . import gcdt_lifecycle
 # creating docopt parameters and usage help
 DOC = '''Usage:
         kumo deploy [--override-stack-policy] [-v]
+        kumo deploy-multi [--override-stack-policy] [--concurrency=<n>] [<stack_dir>...] [-v]
         kumo list [-v]
         kumo delete -f [-v]
         kumo generate [-v]
-        kumo preview [-v]
+        kumo preview [-v] [--json]
         kumo dot [-v]
         kumo stop <stack_name> [-v]
         kumo start <stack_name> [-v]
@@ -43,6 +46,7 @@ DOC = '''Usage:
 -h --help           show this
 -v --verbose        show debug messages
 --json              use json format
+--concurrency=<n>   max. number of stacks deployed at the same time
 '''
 
 
@@ -86,8 +90,10 @@ def deploy_cmd(override, **tooldata):
 
     cloudformation = load_template()
     call_pre_hook(awsclient, cloudformation)
+    # describe the stack only once for the whole deployment
+    snapshot = StackSnapshot(awsclient, conf.get('stack', {}).get('StackName'))
 
-    if get_parameter_diff(awsclient, conf):
+    if get_parameter_diff(awsclient, conf, snapshot=snapshot):
         print(colored.red('Parameters have changed. Waiting 10 seconds. \n'))
         print('If parameters are unexpected you might want to exit now: control-c')
         # Choose a spin style.
@@ -100,10 +106,45 @@ def deploy_cmd(override, **tooldata):
         print('\n')
 
     exit_code = deploy_stack(awsclient, context, conf, cloudformation,
-                             override_stack_policy=override)
+                             override_stack_policy=override,
+                             snapshot=snapshot)
     return exit_code
 
 
+@cmd(spec=['deploy-multi', '--override-stack-policy', '--concurrency',
+           '<stack_dir>'])
+def deploy_multi_cmd(override, concurrency, stack_dirs, **tooldata):
+    context = tooldata.get('context')
+    awsclient = context.get('_awsclient')
+
+    if not stack_dirs:
+        stack_dirs = find_stack_dirs()
+    stacks = OrderedDict()
+    for index, stack_dir in enumerate(stack_dirs):
+        stack = read_stack(context, stack_dir, index)
+        if stack is None:
+            return 1
+        if stack['name'] in stacks:
+            print(colored.red('Stack \'%s\' is configured in \'%s\' and \'%s\'' %
+                              (stack['name'], stacks[stack['name']]['dir'],
+                               stack_dir)))
+            return 1
+        stacks[stack['name']] = stack
+    if not stacks:
+        print(colored.red('No stacks found.'))
+        return 1
+    add_dependencies(stacks)
+
+    results = deploy_stacks(
+        awsclient, context, stacks,
+        concurrency=int(concurrency) if concurrency else None,
+        override_stack_policy=override)
+    print_results(results)
+    if any(r != 'done' for r in results.values()):
+        return 1
+    return 0
+
+
 @cmd(spec=['delete', '-f'])
 def delete_cmd(force, **tooldata):
     context = tooldata.get('context')
@@ -127,26 +168,35 @@ def list_cmd(**tooldata):
     list_stacks(awsclient)
 
 
-@cmd(spec=['preview'])
-def preview_cmd(**tooldata):
+@cmd(spec=['preview', '--json'])
+def preview_cmd(json, **tooldata):
     context = tooldata.get('context')
+    if json:
+        context['format'] = 'json'
+    else:
+        context['format'] = 'tabular'
     conf = tooldata.get('config')
     awsclient = context.get('_awsclient')
     cloudformation = load_template()
-    get_parameter_diff(awsclient, conf)
+    snapshot = StackSnapshot(awsclient, conf.get('stack', {}).get('StackName'))
+    if context['format'] == 'tabular':
+        get_parameter_diff(awsclient, conf, snapshot=snapshot)
     change_set, stack_name, change_set_type = \
-        create_change_set(awsclient, context, conf, cloudformation)
-    if change_set_type == 'CREATE':
-        print('Stack \'%s\' does not exist.' % stack_name)
-        print('`kumo deploy` would create the following resources:')
-    else:
-        print('`kumo deploy` would update the following resources:')
-    describe_change_set(awsclient, change_set, stack_name)
+        create_change_set(awsclient, context, conf, cloudformation,
+                          snapshot=snapshot)
+    if context['format'] == 'tabular':
+        if change_set_type == 'CREATE':
+            print('Stack \'%s\' does not exist.' % stack_name)
+            print('`kumo deploy` would create the following resources:')
+        else:
+            print('`kumo deploy` would update the following resources:')
+    describe_change_set(awsclient, change_set, stack_name,
+                        format=context['format'])
     if change_set_type == 'CREATE':
         # we currently do not review stack creations!
         # so we delete the stack in "REVIEW" state
         # more details here: https://github.com/glomex/gcdt/issues/73
-        delete_stack(awsclient, conf, feedback=False)
+        delete_stack(awsclient, conf, feedback=False, snapshot=snapshot)
 
 
 @cmd(spec=['stop', '<stack_name>'])
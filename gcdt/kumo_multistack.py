@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""Deploy multiple kumo stacks in one run.
+Stacks are deployed in the order of their dependencies. A stack depends on
+another stack of the run if its config contains a stack lookup
+('lookup:stack:<stack_name>...') or a parameter with the name of the other
+stack (this is how `kumo_util.StackLookup` is wired). Independent stacks are
+deployed concurrently.
+"""
+from __future__ import unicode_literals, print_function
+import os
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import six
+from clint.textui import colored
+from tabulate import tabulate
+
+from . import gcdt_signals
+from .gcdt_defaults import DEFAULT_CONFIG
+from .gcdt_logging import getLogger
+from .kumo_core import load_cloudformation_template, deploy_stack, \
+    _get_event_poll_interval
+from .utils import GracefulExit, fix_old_kumo_config
+
+
+log = getLogger(__name__)
+
+
+def find_stack_dirs(path='.'):
+    """Find the folders which contain a 'cloudformation.py' template.
+    Hidden folders are skipped and stack folders are not searched for
+    nested stacks.
+
+    :param path: folder to start from
+    :return: list of stack folders
+    """
+    stack_dirs = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted([d for d in dirs if not d.startswith('.')])
+        if 'cloudformation.py' in files:
+            stack_dirs.append(os.path.normpath(root))
+            dirs[:] = []
+    return stack_dirs
+
+
+def read_stack(context, stack_dir, index=0):
+    """Read config and template of a stack folder.
+    Note: the config is read via the config_reader which works on cwd.
+
+    :param context:
+    :param stack_dir:
+    :param index: used to give every template a distinct module name
+    :return: stack dict or None if the stack folder is not usable
+    """
+    cwd = os.getcwd()
+    try:
+        os.chdir(stack_dir)
+        config = {}
+        gcdt_signals.config_read_init.send((context, config))
+        gcdt_signals.config_read_finalized.send((context, config))
+        if 'kumo' in config:
+            # deprecated: old-style "cloudformation" entries
+            fix_old_kumo_config(config)
+        if not config.get('kumo', {}).get('stack', {}).get('StackName'):
+            print(colored.red('No kumo config found in \'%s\'' % stack_dir))
+            return None
+        cloudformation, found = load_cloudformation_template(
+            module_name='cloudformation_%d' % index)
+        if not found:
+            print(colored.red('could not load cloudformation.py from \'%s\'' %
+                              stack_dir))
+            return None
+    finally:
+        os.chdir(cwd)
+    return {
+        'name': config['kumo']['stack']['StackName'],
+        'dir': stack_dir,
+        'config': config,
+        'cloudformation': cloudformation,
+        'dependencies': set()
+    }
+
+
+def _collect_stack_lookups(value, found):
+    # collect the stack names of 'lookup:stack:<stack_name>...' strings
+    if isinstance(value, dict):
+        for v in value.values():
+            _collect_stack_lookups(v, found)
+    elif isinstance(value, list):
+        for v in value:
+            _collect_stack_lookups(v, found)
+    elif isinstance(value, six.string_types) and \
+            value.startswith('lookup:stack:'):
+        found.add(value.split(':')[2])
+
+
+def add_dependencies(stacks):
+    """Add the dependencies between the stacks of a run.
+
+    :param stacks: OrderedDict of stacks (by stack name)
+    """
+    for name, stack in stacks.items():
+        found = set()
+        _collect_stack_lookups(stack['config'], found)
+        # parameters which refer to other stacks (e.g. for StackLookup)
+        parameters = stack['config']['kumo'].get('parameters', {})
+        found.update([v for v in parameters.values()
+                      if isinstance(v, six.string_types)])
+        stack['dependencies'] = set(
+            [s for s in found if s in stacks and s != name])
+
+
+def get_deploy_order(stacks):
+    """Order the stacks so every stack comes after its dependencies.
+
+    :param stacks: OrderedDict of stacks (by stack name)
+    :return: list of stack names
+    """
+    order = []
+    remaining = OrderedDict(
+        [(name, set(s['dependencies'])) for name, s in stacks.items()])
+    while remaining:
+        ready = [name for name, deps in remaining.items()
+                 if not deps - set(order)]
+        if not ready:
+            raise Exception('Circular dependency between stacks: %s' %
+                            ', '.join(remaining.keys()))
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+    return order
+
+
+class _CancellableInterval(object):
+    """Wraps the interval to poll stack events so the deployment of a stack
+    can be cancelled from the main thread.
+    """
+    def __init__(self, interval, cancelled):
+        self._interval = interval
+        self._cancelled = cancelled
+
+    def sleep(self, active=False):
+        if self._cancelled.wait(self._interval.update(active)):
+            # handled like Ctrl-C in a single stack deployment
+            raise GracefulExit('SIGINT')
+
+
+def _deploy(awsclient, context, stack, override_stack_policy, cancelled):
+    # deploy a single stack (runs in a worker thread)
+    context = dict(context)
+    # lookups are resolved now, after the stacks we depend on are deployed
+    config = deepcopy(stack['config'])
+    gcdt_signals.lookup_init.send((context, config))
+    gcdt_signals.lookup_finalized.send((context, config))
+    if 'error' in context:
+        print(colored.red('[%s] %s' % (stack['name'], context['error'])))
+        return 1
+    conf = config['kumo']
+    context['_event_prefix'] = '[%s] ' % stack['name']
+    context['_poll_interval'] = _CancellableInterval(
+        _get_event_poll_interval(conf), cancelled)
+    print(colored.green('[%s] deploying stack from \'%s\'' % (
+        stack['name'], stack['dir'])))
+    return deploy_stack(awsclient, context, conf, stack['cloudformation'],
+                        override_stack_policy=override_stack_policy)
+
+
+def deploy_stacks(awsclient, context, stacks, concurrency=None,
+                  override_stack_policy=False):
+    """Deploy the stacks, independent stacks are deployed concurrently.
+    Stacks which depend on a failed stack are skipped.
+
+    :param awsclient:
+    :param context:
+    :param stacks: OrderedDict of stacks (by stack name)
+    :param concurrency: max. number of stacks deployed at the same time
+    :param override_stack_policy:
+    :return: dict with the result for every stack
+    """
+    if not concurrency:
+        concurrency = DEFAULT_CONFIG['kumo']['deploy_concurrency']
+    get_deploy_order(stacks)  # bail out on circular dependencies
+    # clients are shared by the workers
+    awsclient.get_client('cloudformation')
+    awsclient.get_client('s3')
+
+    results = OrderedDict([(name, 'pending') for name in stacks.keys()])
+    running = {}  # future -> stack name
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        while True:
+            for name in [n for n, r in results.items() if r == 'pending']:
+                deps = [results[d] for d in stacks[name]['dependencies']]
+                if any(d in ['failed', 'skipped'] for d in deps):
+                    print(colored.yellow(
+                        '[%s] skipped since a dependency failed' % name))
+                    results[name] = 'skipped'
+                elif all(d == 'done' for d in deps) and \
+                        len(running) < concurrency:
+                    future = executor.submit(
+                        _deploy, awsclient, context, stacks[name],
+                        override_stack_policy, cancelled)
+                    running[future] = name
+                    results[name] = 'running'
+            if not running:
+                break
+            # timeout so we receive signals (Python 2)
+            done, _ = wait(list(running.keys()), timeout=1,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = _get_result(name, future)
+    except GracefulExit as e:
+        log.info('Received %s signal - cancel deployment of %s',
+                 str(e), ', '.join(running.values()))
+        cancelled.set()
+        # the workers cancel the stack updates
+        wait(list(running.keys()))
+        for future, name in running.items():
+            _get_result(name, future)
+            results[name] = 'cancelled'
+        for name in [n for n, r in results.items() if r == 'pending']:
+            results[name] = 'skipped'
+    finally:
+        executor.shutdown(wait=False)
+    return results
+
+
+def _get_result(name, future):
+    try:
+        exit_code = future.result()
+    except GracefulExit:
+        return 'cancelled'
+    except Exception as e:
+        print(colored.red('[%s] deployment failed: %s' % (name, e)))
+        return 'failed'
+    if exit_code:
+        return 'failed'
+    return 'done'
+
+
+def print_results(results):
+    table = [[name, result] for name, result in results.items()]
+    print(tabulate(table, headers=['Stack', 'Result']))
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from .gcdt_defaults import DEFAULT_CONFIG
 from .gcdt_logging import getLogger
-from .utils import all_pages
+from .utils import all_pages, AdaptiveInterval
 from .kumo_core import stack_exists
 
 log = getLogger(__name__)
@@ -15,10 +18,10 @@ def _stop_ec2_instances(awsclient, ec2_instances, wait=True):
     :param awsclient:
     :param ec2_instances:
     :param wait: waits for instances to stop
-    :return:
+    :return: list of instances which are stopped
     """
     if len(ec2_instances) == 0:
-        return
+        return []
     client_ec2 = awsclient.get_client('ec2')
 
     # get running instances
@@ -42,6 +45,7 @@ def _stop_ec2_instances(awsclient, ec2_instances, wait=True):
             # wait for instances to stop
             waiter_inst_stopped = client_ec2.get_waiter('instance_stopped')
             waiter_inst_stopped.wait(InstanceIds=running_instances)
+    return running_instances
 
 
 def _start_ec2_instances(awsclient, ec2_instances, wait=True):
@@ -50,10 +54,10 @@ def _start_ec2_instances(awsclient, ec2_instances, wait=True):
     :param awsclient:
     :param ec2_instances:
     :param wait: waits for instances to start
-    :return:
+    :return: list of instances which are started
     """
     if len(ec2_instances) == 0:
-        return
+        return []
     client_ec2 = awsclient.get_client('ec2')
 
     # get stopped instances
@@ -83,6 +87,7 @@ def _start_ec2_instances(awsclient, ec2_instances, wait=True):
             # wait for status checks
             waiter_status_ok = client_ec2.get_waiter('instance_status_ok')
             waiter_status_ok.wait(InstanceIds=stopped_instances)
+    return stopped_instances
 
 
 def _filter_db_instances_by_status(awsclient, db_instances, status_list):
@@ -93,18 +98,8 @@ def _filter_db_instances_by_status(awsclient, db_instances, status_list):
     :param status_list:
     :return: list of db_instances that match the filter
     """
-    client_rds = awsclient.get_client('rds')
-    db_instances_with_status = []
-
-    for db in db_instances:
-        response = client_rds.describe_db_instances(
-            DBInstanceIdentifier=db
-        )
-        for entry in response.get('DBInstances', []):
-            if entry['DBInstanceStatus'] in status_list:
-                db_instances_with_status.append(db)
-
-    return db_instances_with_status
+    states = _get_db_instance_states(awsclient, db_instances)
+    return [db for db in db_instances if states.get(db) in status_list]
 
 
 def _stop_ecs_services(awsclient, services, template, parameters, wait=True):
@@ -166,8 +161,294 @@ def _start_ecs_services(awsclient, services, template, parameters, wait=True):
         )
 
 
+def _chunks(items, size):
+    # split a list into chunks (API calls are limited in the number of ids)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _get_autoscaling_instances(awsclient, asg_names):
+    """Helper to find the instances of autoscaling groups.
+    One describe call per 50 groups (instead of paging through all
+    autoscaling instances of the account).
+
+    :param awsclient:
+    :param asg_names: list of autoscaling group names
+    :return: dict autoscaling group name -> list of instance ids
+    """
+    client_autoscaling = awsclient.get_client('autoscaling')
+    asg_instances = {name: [] for name in asg_names}
+    for chunk in _chunks(list(asg_names), 50):
+        groups = all_pages(
+            client_autoscaling.describe_auto_scaling_groups,
+            {'AutoScalingGroupNames': chunk},
+            lambda r: r.get('AutoScalingGroups', [])
+        )
+        for group in groups:
+            asg_instances[group['AutoScalingGroupName']] = \
+                [i['InstanceId'] for i in group.get('Instances', [])]
+    return asg_instances
+
+
+def _get_ec2_instance_states(awsclient, ec2_instances):
+    # instance id -> state name (instances which do not exist are omitted)
+    client_ec2 = awsclient.get_client('ec2')
+    states = {}
+    for chunk in _chunks(list(ec2_instances), 100):
+        # a filter does not fail for unknown (e.g. terminated) instances
+        reservations = all_pages(
+            client_ec2.describe_instances,
+            {'Filters': [{'Name': 'instance-id', 'Values': chunk}]},
+            lambda r: r.get('Reservations', [])
+        )
+        for reservation in reservations:
+            for instance in reservation.get('Instances', []):
+                states[instance['InstanceId']] = instance['State']['Name']
+    return states
+
+
+def _get_ec2_instances_status_ok(awsclient, ec2_instances):
+    # instances which passed the status checks
+    if not ec2_instances:
+        return []
+    client_ec2 = awsclient.get_client('ec2')
+    return all_pages(
+        client_ec2.describe_instance_status,
+        {'InstanceIds': list(ec2_instances)},
+        lambda r: [i['InstanceId'] for i in r.get('InstanceStatuses', [])
+                   if i['InstanceStatus']['Status'] == 'ok' and
+                   i['SystemStatus']['Status'] == 'ok']
+    )
+
+
+def _get_db_instance_states(awsclient, db_instances):
+    # db instance identifier -> status (one describe call per 100 instances)
+    client_rds = awsclient.get_client('rds')
+    states = {}
+    for chunk in _chunks(list(db_instances), 100):
+        request = {'Filters': [{'Name': 'db-instance-id', 'Values': chunk}]}
+        while True:
+            response = client_rds.describe_db_instances(**request)
+            for entry in response.get('DBInstances', []):
+                states[entry['DBInstanceIdentifier']] = \
+                    entry['DBInstanceStatus']
+            if not response.get('Marker'):
+                break
+            request['Marker'] = response['Marker']
+    return states
+
+
+def wait_for_resources(awsclient, targets, poll_interval=None, timeout=None):
+    """Wait until all resources reached their target state. Instead of
+    chaining one waiter per resource all pending resources are polled
+    together (one describe call per service and round).
+
+    :param awsclient:
+    :param targets: dict target state -> list of resource ids. Target states
+        are 'instance_stopped', 'instance_running' (including status checks),
+        'instance_terminated' and 'db_instance_available'
+    :param poll_interval: AdaptiveInterval to control the polling
+    :param timeout: max. time to wait in seconds
+    """
+    pending = {state: set(ids) for state, ids in targets.items() if ids}
+    if not pending:
+        return
+    polling = DEFAULT_CONFIG['kumo']['resource_polling']
+    if poll_interval is None:
+        poll_interval = AdaptiveInterval(
+            polling['min_interval'], polling['max_interval'],
+            polling['backoff'], polling['jitter'])
+    if timeout is None:
+        timeout = polling['timeout']
+    waited = 0
+    while True:
+        ec2_instances = set().union(*[
+            pending.get(state, set()) for state in
+            ['instance_stopped', 'instance_running', 'instance_terminated']])
+        if ec2_instances:
+            states = _get_ec2_instance_states(awsclient, ec2_instances)
+            pending.get('instance_stopped', set()).difference_update(
+                [i for i, state in states.items() if state == 'stopped'])
+            terminated = pending.get('instance_terminated', set())
+            terminated.difference_update(
+                [i for i in list(terminated)
+                 if states.get(i, 'terminated') == 'terminated'])
+            running = pending.get('instance_running', set())
+            failed = [i for i in running
+                      if states.get(i, 'terminated') in
+                      ['shutting-down', 'terminated']]
+            if failed:
+                raise Exception('EC2 instances terminated: %s' %
+                                ', '.join(failed))
+            running.difference_update(_get_ec2_instances_status_ok(
+                awsclient,
+                [i for i in running if states.get(i) == 'running']))
+        if pending.get('db_instance_available'):
+            states = _get_db_instance_states(
+                awsclient, pending['db_instance_available'])
+            pending['db_instance_available'].difference_update(
+                [db for db, state in states.items() if state == 'available'])
+
+        pending = {state: ids for state, ids in pending.items() if ids}
+        if not pending:
+            return
+        if waited >= timeout:
+            raise Exception('Timeout while waiting for resources: %s' %
+                            pending)
+        log.debug('waiting for: %s', pending)
+        interval = poll_interval.update()
+        waited += interval
+        time.sleep(interval)
+
+
+def _run_concurrently(tasks):
+    """Run the tasks concurrently and merge the wait targets they return.
+
+    :param tasks: list of (function, args)
+    :return: dict target state -> list of resource ids
+    """
+    targets = {}
+    tasks = [t for t in tasks if t]
+    if not tasks:
+        return targets
+    executor = ThreadPoolExecutor(max_workers=len(tasks))
+    try:
+        futures = [executor.submit(func, *args) for func, args in tasks]
+        for future in futures:
+            for state, ids in (future.result() or {}).items():
+                targets.setdefault(state, []).extend(ids)
+    finally:
+        executor.shutdown(wait=True)
+    return targets
+
+
+def _get_stack_resources(awsclient, stack_name):
+    # group the stack resources by type
+    client_cfn = awsclient.get_client('cloudformation')
+    resources = all_pages(
+        client_cfn.list_stack_resources,
+        {'StackName': stack_name},
+        lambda r: r['StackResourceSummaries']
+    )
+    grouped = {}
+    for r in resources:
+        grouped.setdefault(r['ResourceType'], []).append(r)
+    return grouped
+
+
+def _get_scaling_process_types(awsclient):
+    # lookup all types of scaling processes
+    #    [Launch, Terminate, HealthCheck, ReplaceUnhealthy, AZRebalance
+    #     AlarmNotification, ScheduledActions, AddToLoadBalancer]
+    client_autoscaling = awsclient.get_client('autoscaling')
+    response = client_autoscaling.describe_scaling_process_types()
+    return [t['ProcessName'] for t in response.get('Processes', [])]
+
+
+def _stop_autoscaling_groups(awsclient, autoscaling_groups, asg_instances,
+                             use_suspend):
+    """Helper to stop autoscaling groups (resize or suspend).
+
+    :return: wait targets
+    """
+    client_autoscaling = awsclient.get_client('autoscaling')
+    if use_suspend:
+        scaling_process_types = _get_scaling_process_types(awsclient)
+    instances = []
+    for asg in autoscaling_groups:
+        instances.extend(asg_instances.get(asg['PhysicalResourceId'], []))
+        if use_suspend:
+            # alternative implementation to speed up start
+            # only problem is that instances must survive stop & start
+            # suspend all autoscaling processes
+            log.info('Suspending all autoscaling processes for \'%s\'',
+                     asg['LogicalResourceId'])
+            response = client_autoscaling.suspend_processes(
+                AutoScalingGroupName=asg['PhysicalResourceId'],
+                ScalingProcesses=scaling_process_types
+            )
+        else:
+            # resize autoscaling group (min, max = 0)
+            log.info('Resize autoscaling group \'%s\' to minSize=0, maxSize=0',
+                     asg['LogicalResourceId'])
+            response = client_autoscaling.update_auto_scaling_group(
+                AutoScalingGroupName=asg['PhysicalResourceId'],
+                MinSize=0,
+                MaxSize=0
+            )
+    if use_suspend:
+        return {'instance_stopped': _stop_ec2_instances(
+            awsclient, instances, wait=False)}
+    # wait for instances to terminate
+    return {'instance_terminated': instances}
+
+
+def _start_autoscaling_groups(awsclient, autoscaling_groups, template,
+                              parameters, use_suspend):
+    """Helper to start autoscaling groups (resize or resume).
+    Note: in suspend mode the instances need to be started first.
+    """
+    client_autoscaling = awsclient.get_client('autoscaling')
+    if use_suspend:
+        scaling_process_types = _get_scaling_process_types(awsclient)
+    for asg in autoscaling_groups:
+        if use_suspend:
+            # resume all autoscaling processes
+            log.info('Resuming all autoscaling processes for \'%s\'',
+                     asg['LogicalResourceId'])
+            response = client_autoscaling.resume_processes(
+                AutoScalingGroupName=asg['PhysicalResourceId'],
+                ScalingProcesses=scaling_process_types
+            )
+        else:
+            # resize autoscaling group back to its original values
+            log.info('Resize autoscaling group \'%s\' back to original values',
+                     asg['LogicalResourceId'])
+            min, max = _get_autoscaling_min_max(
+                template, parameters, asg['LogicalResourceId'])
+            response = client_autoscaling.update_auto_scaling_group(
+                AutoScalingGroupName=asg['PhysicalResourceId'],
+                MinSize=min,
+                MaxSize=max
+            )
+
+
+def _stop_instances(awsclient, ec2_instances):
+    return {'instance_stopped': _stop_ec2_instances(
+        awsclient, ec2_instances, wait=False)}
+
+
+def _start_instances(awsclient, ec2_instances):
+    return {'instance_running': _start_ec2_instances(
+        awsclient, ec2_instances, wait=False)}
+
+
+def _stop_db_instances(awsclient, db_instances):
+    client_rds = awsclient.get_client('rds')
+    running_db_instances = _filter_db_instances_by_status(
+        awsclient, db_instances, ['available']
+    )
+    for db in running_db_instances:
+        log.info('Stopping RDS instance \'%s\'', db)
+        client_rds.stop_db_instance(DBInstanceIdentifier=db)
+
+
+def _start_db_instances(awsclient, db_instances):
+    client_rds = awsclient.get_client('rds')
+    stopped_db_instances = _filter_db_instances_by_status(
+        awsclient, db_instances, ['stopped']
+    )
+    for db in stopped_db_instances:
+        log.info('Starting RDS instance \'%s\'', db)
+        client_rds.start_db_instance(DBInstanceIdentifier=db)
+    # wait for db instances to become available
+    return {'db_instance_available': stopped_db_instances}
+
+
 def stop_stack(awsclient, stack_name, use_suspend=False):
     """Stop an existing stack on AWS cloud.
+    All resource types are stopped concurrently, then we wait for the
+    EC2 instances to stop / terminate.
 
     :param awsclient:
     :param stack_name:
@@ -184,102 +465,36 @@ def stop_stack(awsclient, stack_name, use_suspend=False):
     if not stack_exists(awsclient, stack_name):
         log.warn('Stack \'%s\' not deployed - nothing to do!', stack_name)
     else:
-        client_cfn = awsclient.get_client('cloudformation')
-        client_autoscaling = awsclient.get_client('autoscaling')
-        client_rds = awsclient.get_client('rds')
-        client_ec2 = awsclient.get_client('ec2')
-
-        resources = all_pages(
-            client_cfn.list_stack_resources,
-            { 'StackName': stack_name },
-            lambda r: r['StackResourceSummaries']
-        )
-
-        autoscaling_groups = [
-            r for r in resources
-            if r['ResourceType'] == 'AWS::AutoScaling::AutoScalingGroup'
-        ]
-
-        # lookup all types of scaling processes
-        #    [Launch, Terminate, HealthCheck, ReplaceUnhealthy, AZRebalance
-        #     AlarmNotification, ScheduledActions, AddToLoadBalancer]
-        response = client_autoscaling.describe_scaling_process_types()
-        scaling_process_types = [t['ProcessName'] for t in response.get('Processes', [])]
-
-        for asg in autoscaling_groups:
-            # find instances in autoscaling group
-            ec2_instances = all_pages(
-                client_autoscaling.describe_auto_scaling_instances,
-                {},
-                lambda r: [i['InstanceId'] for i in r.get('AutoScalingInstances', [])
-                           if i['AutoScalingGroupName'] == asg['PhysicalResourceId']],
-            )
-
-            if use_suspend:
-                # alternative implementation to speed up start
-                # only problem is that instances must survive stop & start
-                # suspend all autoscaling processes
-                log.info('Suspending all autoscaling processes for \'%s\'',
-                         asg['LogicalResourceId'])
-                response = client_autoscaling.suspend_processes(
-                    AutoScalingGroupName=asg['PhysicalResourceId'],
-                    ScalingProcesses=scaling_process_types
-                )
-
-                _stop_ec2_instances(awsclient, ec2_instances)
-            else:
-                # resize autoscaling group (min, max = 0)
-                log.info('Resize autoscaling group \'%s\' to minSize=0, maxSize=0',
-                         asg['LogicalResourceId'])
-                response = client_autoscaling.update_auto_scaling_group(
-                    AutoScalingGroupName=asg['PhysicalResourceId'],
-                    MinSize=0,
-                    MaxSize=0
-                )
-                if ec2_instances:
-                    running_instances = all_pages(
-                        client_ec2.describe_instance_status,
-                        {
-                            'InstanceIds': ec2_instances,
-                            'Filters': [{
-                                'Name': 'instance-state-name',
-                                'Values': ['pending', 'running']
-                            }]
-                        },
-                        lambda r: [i['InstanceId'] for i in r.get('InstanceStatuses', [])],
-                    )
-                    if running_instances:
-                        # wait for instances to terminate
-                        waiter_inst_terminated = client_ec2.get_waiter('instance_terminated')
-                        waiter_inst_terminated.wait(InstanceIds=running_instances)
-
-        # setting ECS desiredCount to zero
-        services = [
-            r for r in resources
-            if r['ResourceType'] == 'AWS::ECS::Service'
-        ]
+        resources = _get_stack_resources(awsclient, stack_name)
+        autoscaling_groups = resources.get(
+            'AWS::AutoScaling::AutoScalingGroup', [])
+        services = resources.get('AWS::ECS::Service', [])
+        instances = [r['PhysicalResourceId'] for r in
+                     resources.get('AWS::EC2::Instance', [])]
+        db_instances = [r['PhysicalResourceId'] for r in
+                        resources.get('AWS::RDS::DBInstance', [])]
+
+        tasks = []
+        if autoscaling_groups:
+            # find instances in autoscaling groups
+            asg_instances = _get_autoscaling_instances(
+                awsclient,
+                [asg['PhysicalResourceId'] for asg in autoscaling_groups])
+            tasks.append((_stop_autoscaling_groups,
+                          (awsclient, autoscaling_groups, asg_instances,
+                           use_suspend)))
         if services:
-            template, parameters = _get_template_parameters(awsclient, stack_name)
-            _stop_ecs_services(awsclient, services, template, parameters)
-
-        # stopping ec2 instances
-        instances = [
-            r['PhysicalResourceId'] for r in resources
-            if r['ResourceType'] == 'AWS::EC2::Instance'
-        ]
-        _stop_ec2_instances(awsclient, instances)
-
-        # stopping db instances
-        db_instances = [
-            r['PhysicalResourceId'] for r in resources
-            if r['ResourceType'] == 'AWS::RDS::DBInstance'
-        ]
-        running_db_instances = _filter_db_instances_by_status(
-            awsclient, db_instances, ['available']
-        )
-        for db in running_db_instances:
-            log.info('Stopping RDS instance \'%s\'', db)
-            client_rds.stop_db_instance(DBInstanceIdentifier=db)
+            # setting ECS desiredCount to zero
+            template, parameters = _get_template_parameters(awsclient,
+                                                            stack_name)
+            tasks.append((_stop_ecs_services,
+                          (awsclient, services, template, parameters)))
+        if instances:
+            tasks.append((_stop_instances, (awsclient, instances)))
+        if db_instances:
+            tasks.append((_stop_db_instances, (awsclient, db_instances)))
+
+        wait_for_resources(awsclient, _run_concurrently(tasks))
 
     return exit_code
 
@@ -347,6 +562,8 @@ def _get_template_parameters(awsclient, stack_name):
 
 def start_stack(awsclient, stack_name, use_suspend=False):
     """Start an existing stack on AWS cloud.
+    Databases and EC2 instances are started concurrently. Autoscaling groups
+    and ECS services are started once the databases are available.
 
     :param awsclient:
     :param stack_name:
@@ -363,93 +580,48 @@ def start_stack(awsclient, stack_name, use_suspend=False):
     if not stack_exists(awsclient, stack_name):
         log.warn('Stack \'%s\' not deployed - nothing to do!', stack_name)
     else:
-        client_cfn = awsclient.get_client('cloudformation')
-        client_autoscaling = awsclient.get_client('autoscaling')
-        client_rds = awsclient.get_client('rds')
-
-        resources = all_pages(
-            client_cfn.list_stack_resources,
-            { 'StackName': stack_name },
-            lambda r: r['StackResourceSummaries']
-        )
-
-        autoscaling_groups = [
-            r for r in resources
-            if r['ResourceType'] == 'AWS::AutoScaling::AutoScalingGroup'
-        ]
-
-        # lookup all types of scaling processes
-        #    [Launch, Terminate, HealthCheck, ReplaceUnhealthy, AZRebalance
-        #     AlarmNotification, ScheduledActions, AddToLoadBalancer]
-        response = client_autoscaling.describe_scaling_process_types()
-        scaling_process_types = [t['ProcessName'] for t in response.get('Processes', [])]
-
-        # starting db instances
-        db_instances = [
-            r['PhysicalResourceId'] for r in resources
-            if r['ResourceType'] == 'AWS::RDS::DBInstance'
-        ]
-        stopped_db_instances = _filter_db_instances_by_status(
-            awsclient, db_instances, ['stopped']
-        )
-        for db in stopped_db_instances:
-            log.info('Starting RDS instance \'%s\'', db)
-            client_rds.start_db_instance(DBInstanceIdentifier=db)
-
-        # wait for db instances to become available
-        for db in stopped_db_instances:
-            waiter_db_available = client_rds.get_waiter('db_instance_available')
-            waiter_db_available.wait(DBInstanceIdentifier=db)
-
-        # starting ec2 instances
-        instances = [
-            r['PhysicalResourceId'] for r in resources
-            if r['ResourceType'] == 'AWS::EC2::Instance'
-        ]
-        _start_ec2_instances(awsclient, instances)
-
-        services = [
-            r for r in resources
-            if r['ResourceType'] == 'AWS::ECS::Service'
-        ]
+        resources = _get_stack_resources(awsclient, stack_name)
+        autoscaling_groups = resources.get(
+            'AWS::AutoScaling::AutoScalingGroup', [])
+        services = resources.get('AWS::ECS::Service', [])
+        instances = [r['PhysicalResourceId'] for r in
+                     resources.get('AWS::EC2::Instance', [])]
+        db_instances = [r['PhysicalResourceId'] for r in
+                        resources.get('AWS::RDS::DBInstance', [])]
+
+        if autoscaling_groups and use_suspend:
+            # alternative implementation to speed up start
+            # only problem is that instances must survive stop & start
+            # find instances in autoscaling groups
+            asg_instances = _get_autoscaling_instances(
+                awsclient,
+                [asg['PhysicalResourceId'] for asg in autoscaling_groups])
+            for asg in autoscaling_groups:
+                instances.extend(asg_instances[asg['PhysicalResourceId']])
+
+        # starting db instances and ec2 instances
+        tasks = []
+        if db_instances:
+            tasks.append((_start_db_instances, (awsclient, db_instances)))
+        if instances:
+            tasks.append((_start_instances, (awsclient, instances)))
+        wait_for_resources(awsclient, _run_concurrently(tasks))
 
         if (autoscaling_groups and not use_suspend) or services:
-            template, parameters = _get_template_parameters(awsclient, stack_name)
+            template, parameters = _get_template_parameters(awsclient,
+                                                            stack_name)
+        else:
+            template, parameters = None, None
 
-        # setting ECS desiredCount back
+        # setting ECS desiredCount and autoscaling groups back
+        tasks = []
         if services:
-            _start_ecs_services(awsclient, services, template, parameters)
-
-        for asg in autoscaling_groups:
-            if use_suspend:
-                # alternative implementation to speed up start
-                # only problem is that instances must survive stop & start
-                # find instances in autoscaling group
-                instances = all_pages(
-                    client_autoscaling.describe_auto_scaling_instances,
-                    {},
-                    lambda r: [i['InstanceId'] for i in r.get('AutoScalingInstances', [])
-                               if i['AutoScalingGroupName'] == asg['PhysicalResourceId']],
-                )
-                _start_ec2_instances(awsclient, instances)
-
-                # resume all autoscaling processes
-                log.info('Resuming all autoscaling processes for \'%s\'',
-                         asg['LogicalResourceId'])
-                response = client_autoscaling.resume_processes(
-                    AutoScalingGroupName=asg['PhysicalResourceId'],
-                    ScalingProcesses=scaling_process_types
-                )
-            else:
-                # resize autoscaling group back to its original values
-                log.info('Resize autoscaling group \'%s\' back to original values',
-                         asg['LogicalResourceId'])
-                min, max = _get_autoscaling_min_max(
-                    template, parameters, asg['LogicalResourceId'])
-                response = client_autoscaling.update_auto_scaling_group(
-                    AutoScalingGroupName=asg['PhysicalResourceId'],
-                    MinSize=min,
-                    MaxSize=max
-                )
+            tasks.append((_start_ecs_services,
+                          (awsclient, services, template, parameters)))
+        if autoscaling_groups:
+            tasks.append((_start_autoscaling_groups,
+                          (awsclient, autoscaling_groups, template,
+                           parameters, use_suspend)))
+        _run_concurrently(tasks)
 
     return exit_code
@@ -70,6 +70,15 @@ def delete_bucket(awsclient, bucket):
 
 
 ### keys
+def object_exists(awsclient, bucket, key):
+    client_s3 = awsclient.get_client('s3')
+    try:
+        client_s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError:
+        return False
+
+
 def upload_file_to_s3(awsclient, bucket, key, filename):
     """Upload a file to AWS S3 bucket.
 
@@ -350,10 +350,11 @@ def all_pages(method, request, accessor, cond=None):
     if cond is None:
         cond = lambda x: True
     result = []
+    token_key = 'nextToken'
     next_token = None
     while True:
         if next_token:
-            request['nextToken'] = next_token
+            request[token_key] = next_token
         response = method(**request)
         if cond(response):
             data = accessor(response)
@@ -362,8 +363,78 @@ def all_pages(method, request, accessor, cond=None):
                     result.extend(data)
                 else:
                     result.append(data)
-        if 'nextToken' not in response:
+        # most services use 'NextToken', some (ECS, logs) use 'nextToken'
+        if 'NextToken' in response:
+            token_key = 'NextToken'
+        if not response.get(token_key):
             break
-        next_token = response['nextToken']
+        next_token = response[token_key]
 
-    return result
\ No newline at end of file
+    return result
+
+class BoundedSet(object):
+    """Set which remembers at most `maxlen` items. Once the limit is reached
+    the oldest items are evicted first.
+    This is used to track ids of already processed items (e.g. events) during
+    long running polls without growing memory indefinitely.
+    """
+    def __init__(self, maxlen=10000):
+        self._maxlen = maxlen
+        self._items = set()
+        self._order = collections.deque()
+
+    def add(self, item):
+        if item in self._items:
+            return
+        if len(self._order) >= self._maxlen:
+            self._items.discard(self._order.popleft())
+        self._order.append(item)
+        self._items.add(item)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class AdaptiveInterval(object):
+    """Polling interval which adapts to activity.
+
+    The interval drops back to `min_interval` whenever a poll saw activity and
+    grows by factor `backoff` (up to `max_interval`) while polls stay idle.
+    Use `jitter` (0.0 - 1.0) to randomize the interval so concurrent pollers
+    do not hit the AWS API at the same time.
+    """
+    def __init__(self, min_interval=1.0, max_interval=10.0, backoff=1.5,
+                 jitter=0.0):
+        assert 0 < min_interval <= max_interval
+        assert backoff >= 1.0
+        assert 0.0 <= jitter <= 1.0
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self._interval = min_interval
+
+    def update(self, active=False):
+        """Calculate the next interval.
+
+        :param active: True if the last poll returned something new
+        :return: interval in seconds
+        """
+        if active:
+            self._interval = self.min_interval
+        else:
+            self._interval = min(self._interval * self.backoff,
+                                 self.max_interval)
+        if self.jitter:
+            return self._interval * (1.0 - self.jitter * random.random())
+        return self._interval
+
+    def sleep(self, active=False):
+        """Sleep for the next interval.
+
+        :param active: True if the last poll returned something new
+        """
+        time.sleep(self.update(active))
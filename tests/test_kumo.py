@@ -7,13 +7,19 @@ from nose.tools import assert_dict_equal
 from nose.tools import assert_equal, assert_true, \
     assert_regexp_matches, assert_list_equal, raises
 import pytest
+from botocore.exceptions import ClientError
 
 from gcdt.kumo_core import _generate_parameters, \
     load_cloudformation_template, write_template_to_file, _get_stack_name, \
     _get_stack_policy, _get_stack_policy_during_update, _get_conf_value, \
-    _generate_parameter_entry, _call_hook, generate_template
-from gcdt.kumo_start_stop import _get_autoscaling_min_max
-from gcdt.utils import fix_old_kumo_config
+    _generate_parameter_entry, _call_hook, generate_template, \
+    _get_new_stack_events, stream_stack_events, _get_event_poll_interval, \
+    StackSnapshot, stack_exists, get_parameter_diff, \
+    get_template_fingerprint, _is_stack_up_to_date, _get_stack_policy, \
+    _template_cache, wait_for_change_set, describe_change_set
+from gcdt.kumo_start_stop import _get_autoscaling_min_max, \
+    wait_for_resources, _get_autoscaling_instances
+from gcdt.utils import fix_old_kumo_config, BoundedSet
 from gcdt.gcdt_config_reader import read_json_config
 
 from gcdt_testtools.helpers import cleanup_tempfiles, temp_folder  # fixtures!
@@ -313,3 +319,374 @@ def test_get_autoscaling_min_max():
     assert _get_autoscaling_min_max(
         template_json, parameters, 'SupercarsAutoscalingGroup'
     ) == (1, 2)
+
+
+def _stack_event(event_id, status='CREATE_IN_PROGRESS', resource='Res',
+                 timestamp=None):
+    return {
+        'EventId': event_id,
+        'LogicalResourceId': resource,
+        'ResourceStatus': status,
+        'Timestamp': timestamp or event_id
+    }
+
+
+class _FakeEventsClient(object):
+    """Returns the prepared describe_stack_events pages (newest first)."""
+    def __init__(self, polls):
+        self._polls = polls  # list of polls, each poll is a list of pages
+        self._poll = -1
+        self.requests = []
+
+    def describe_stack_events(self, **request):
+        self.requests.append(request)
+        if 'NextToken' not in request:
+            self._poll += 1
+            page = 0
+        else:
+            page = request['NextToken']
+        pages = self._polls[self._poll]
+        response = {'StackEvents': pages[page]}
+        if page + 1 < len(pages):
+            response['NextToken'] = page + 1
+        return response
+
+
+def test_get_new_stack_events_follows_next_token():
+    client = _FakeEventsClient([[
+        [_stack_event(5), _stack_event(4)],
+        [_stack_event(3), _stack_event(2)],
+        [_stack_event(1)]
+    ]])
+    seen = BoundedSet()
+    seen.add(2)
+    events = _get_new_stack_events(client, 'stack-id', seen)
+    # stops at the first seen event, does not read the last page
+    assert [e['EventId'] for e in events] == [3, 4, 5]
+    assert len(client.requests) == 2
+    assert 5 in seen
+
+
+def test_get_new_stack_events_last_event():
+    client = _FakeEventsClient([[
+        [_stack_event(5), _stack_event(4), _stack_event(3)]
+    ]])
+    events = _get_new_stack_events(client, 'stack-id', BoundedSet(),
+                                   last_event=3)
+    assert [e['EventId'] for e in events] == [4, 5]
+
+
+def test_stream_stack_events():
+    client = _FakeEventsClient([
+        [[_stack_event(2), _stack_event(1)]],
+        [[_stack_event(2), _stack_event(1)]],  # idle poll
+        [[_stack_event(4, 'CREATE_COMPLETE', 'my-stack'),
+          _stack_event(3, 'CREATE_COMPLETE'), _stack_event(2)]],
+    ])
+    awsclient = Bunch(get_client=lambda service: client)
+    intervals = []
+    poll_interval = Bunch(sleep=lambda active: intervals.append(active))
+
+    events = list(stream_stack_events(awsclient, 'stack-id', 'my-stack',
+                                      poll_interval=poll_interval))
+    assert [e['EventId'] for e in events] == [1, 2, 3, 4]
+    # no sleep after the stack reached its final state
+    assert intervals == [True, False]
+
+
+def test_get_event_poll_interval():
+    interval = _get_event_poll_interval({'stack': {
+        'StackName': 'my-stack',
+        'eventPolling': {'minInterval': 2, 'maxInterval': 20}
+    }})
+    assert interval.min_interval == 2
+    assert interval.max_interval == 20
+    assert interval.backoff == 1.5
+
+
+class _FakeStacksClient(object):
+    """Counts the describe_stacks calls."""
+    def __init__(self, stacks):
+        self._stacks = stacks
+        self.calls = 0
+
+    def describe_stacks(self, StackName):
+        self.calls += 1
+        return {'Stacks': self._stacks}
+
+
+def test_stack_snapshot():
+    client = _FakeStacksClient([{
+        'StackId': 'stack-id',
+        'StackName': 'my-stack',
+        'StackStatus': 'UPDATE_COMPLETE',
+        'Parameters': [{'ParameterKey': 'a', 'ParameterValue': '1'}],
+        'Outputs': [{'OutputKey': 'b', 'OutputValue': '2'}]
+    }])
+    awsclient = Bunch(get_client=lambda service: client)
+    snapshot = StackSnapshot(awsclient, 'my-stack')
+
+    assert stack_exists(awsclient, 'my-stack', snapshot)
+    assert snapshot.stack_id == 'stack-id'
+    assert snapshot.state == 'UPDATE_COMPLETE'
+    assert snapshot.outputs == [{'OutputKey': 'b', 'OutputValue': '2'}]
+    assert get_parameter_diff(awsclient, {
+        'stack': {'StackName': 'my-stack'},
+        'parameters': {'a': '2'}}, snapshot=snapshot)
+    assert client.calls == 1
+
+    snapshot.invalidate()
+    assert snapshot.exists
+    assert client.calls == 2
+
+
+def test_stack_snapshot_stack_does_not_exist():
+    class _Client(object):
+        def describe_stacks(self, StackName):
+            raise ClientError({'Error': {
+                'Code': 'ValidationError',
+                'Message': 'Stack with id %s does not exist' % StackName}},
+                'DescribeStacks')
+
+    awsclient = Bunch(get_client=lambda service: _Client())
+    snapshot = StackSnapshot(awsclient, 'my-stack')
+    assert not snapshot.exists
+    assert snapshot.stack_id is None
+    assert snapshot.outputs is None
+
+
+def test_get_template_fingerprint():
+    template = {'Resources': {'B': {'Type': 'b'}, 'A': {'Type': 'a'}}}
+    assert get_template_fingerprint(template) == get_template_fingerprint(
+        '{"Resources": {"A": {"Type": "a"}, "B": {"Type": "b"}}}')
+    assert get_template_fingerprint(template) != get_template_fingerprint(
+        {'Resources': {'A': {'Type': 'a'}}})
+
+
+class _FakeDeployedStackClient(_FakeStacksClient):
+    def __init__(self, stack, template, stack_policy):
+        super(_FakeDeployedStackClient, self).__init__([stack])
+        self._template = template
+        self._stack_policy = stack_policy
+
+    def get_template(self, StackName):
+        return {'TemplateBody': self._template}
+
+    def get_stack_policy(self, StackName):
+        return {'StackPolicyBody': self._stack_policy}
+
+
+def _up_to_date(parameters, template=None, stack_policy=None,
+                deployed_parameter='t2.micro'):
+    template_body = json.dumps({
+        'Parameters': {
+            'InstanceType': {'Type': 'String'},
+            'Count': {'Type': 'Number', 'Default': 1}
+        },
+        'Resources': {}
+    })
+    client = _FakeDeployedStackClient({
+        'StackId': 'stack-id',
+        'StackName': 'my-stack',
+        'StackStatus': 'UPDATE_COMPLETE',
+        'Parameters': [
+            {'ParameterKey': 'InstanceType',
+             'ParameterValue': deployed_parameter},
+            {'ParameterKey': 'Count', 'ParameterValue': '1'}
+        ]
+    }, template or json.loads(template_body),
+        stack_policy or _get_stack_policy(None))
+    awsclient = Bunch(get_client=lambda service: client)
+    return _is_stack_up_to_date(
+        awsclient, {'stack': {'StackName': 'my-stack'}}, None,
+        template_body, parameters, StackSnapshot(awsclient, 'my-stack'))
+
+
+def test_is_stack_up_to_date():
+    params = [{'ParameterKey': 'InstanceType', 'ParameterValue': 't2.micro',
+               'UsePreviousValue': False}]
+    assert _up_to_date(params)
+    # changed parameter
+    params[0]['ParameterValue'] = 't2.small'
+    assert not _up_to_date(params)
+    params[0]['ParameterValue'] = 't2.micro'
+    # changed template
+    assert not _up_to_date(params, template={'Resources': {'A': {}}})
+    # changed stack policy
+    assert not _up_to_date(params, stack_policy='{"Statement": []}')
+    # parameter with `NoEcho=True`
+    assert not _up_to_date(params, deployed_parameter='****')
+
+
+_COUNTING_TEMPLATE = """
+COUNTER = {'generate_template': 0}
+
+def generate_template():
+    COUNTER['generate_template'] += 1
+    return '{"Resources": {}}'
+"""
+
+
+def test_generate_template_cache(temp_folder):
+    with open('cloudformation.py', 'w') as tfile:
+        tfile.write(_COUNTING_TEMPLATE)
+    cloudformation, _ = load_cloudformation_template(
+        module_name='cloudformation_counting')
+    config = {'stack': {'StackName': 'my-stack'}, 'parameters': {}}
+
+    assert generate_template({}, config, cloudformation) == '{"Resources": {}}'
+    generate_template({}, config, cloudformation)
+    assert cloudformation.COUNTER['generate_template'] == 1
+
+    # rendered template is reused from disk in the next run
+    _template_cache.clear()
+    assert generate_template({}, config, cloudformation) == '{"Resources": {}}'
+    assert cloudformation.COUNTER['generate_template'] == 1
+
+    # changed config
+    config['parameters']['InstanceType'] = 't2.micro'
+    generate_template({}, config, cloudformation)
+    assert cloudformation.COUNTER['generate_template'] == 2
+
+    # cache disabled
+    config['stack']['templateCache'] = False
+    generate_template({}, config, cloudformation)
+    assert cloudformation.COUNTER['generate_template'] == 3
+
+
+class _FakeChangeSetClient(object):
+    """Returns the prepared describe_change_set responses in order."""
+    def __init__(self, responses):
+        self._responses = responses
+        self.requests = []
+
+    def describe_change_set(self, **request):
+        self.requests.append(request)
+        return self._responses[len(self.requests) - 1]
+
+
+def _change(logical_id, action='Modify'):
+    return {'ResourceChange': {
+        'Action': action, 'LogicalResourceId': logical_id,
+        'ResourceType': 'AWS::S3::Bucket', 'Scope': ['Properties']}}
+
+
+def test_wait_for_change_set():
+    client = _FakeChangeSetClient([
+        {'Status': 'CREATE_PENDING'},
+        {'Status': 'CREATE_IN_PROGRESS'},
+        {'Status': 'CREATE_COMPLETE', 'Changes': []}
+    ])
+    awsclient = Bunch(get_client=lambda service: client)
+    sleeps = []
+    poll_interval = Bunch(sleep=lambda: sleeps.append(1))
+
+    response = wait_for_change_set(awsclient, 'CHANGES', 'my-stack',
+                                   poll_interval=poll_interval)
+    assert response['Status'] == 'CREATE_COMPLETE'
+    assert len(sleeps) == 2
+
+
+def test_describe_change_set_paginated(capsys):
+    client = _FakeChangeSetClient([
+        {'Status': 'CREATE_COMPLETE', 'Changes': [_change('A')],
+         'NextToken': 'token'},
+        {'Status': 'CREATE_COMPLETE', 'Changes': [_change('B', 'Add')]}
+    ])
+    awsclient = Bunch(get_client=lambda service: client)
+
+    changes = describe_change_set(awsclient, 'CHANGES', 'my-stack',
+                                  format='json')
+    assert [c['LogicalResourceId'] for c in changes] == ['A', 'B']
+    assert client.requests[1]['NextToken'] == 'token'
+    out, _ = capsys.readouterr()
+    assert json.loads(out)[1] == {
+        'Action': 'Add', 'LogicalResourceId': 'B', 'PhysicalResourceId': '',
+        'ResourceType': 'AWS::S3::Bucket', 'Replacement': '',
+        'Scope': ['Properties']}
+
+
+class _FakeResourceClient(object):
+    """Fake ec2 / rds / autoscaling client which records the requests."""
+    def __init__(self, ec2_states=None, rds_states=None, groups=None):
+        # states per polling round
+        self._ec2_states = ec2_states or []
+        self._rds_states = rds_states or []
+        self._groups = groups or {}
+        self.requests = []
+
+    def _count(self, operation):
+        return len([r for r in self.requests if r[0] == operation])
+
+    def describe_instances(self, **request):
+        states = self._ec2_states[self._count('describe_instances')]
+        self.requests.append(('describe_instances', request))
+        return {'Reservations': [{'Instances': [
+            {'InstanceId': i, 'State': {'Name': states[i]}}
+            for i in request['Filters'][0]['Values'] if i in states]}]}
+
+    def describe_instance_status(self, **request):
+        self.requests.append(('describe_instance_status', request))
+        return {'InstanceStatuses': [
+            {'InstanceId': i, 'InstanceStatus': {'Status': 'ok'},
+             'SystemStatus': {'Status': 'ok'}}
+            for i in request['InstanceIds']]}
+
+    def describe_db_instances(self, **request):
+        states = self._rds_states[min(self._count('describe_db_instances'),
+                                      len(self._rds_states) - 1)]
+        self.requests.append(('describe_db_instances', request))
+        return {'DBInstances': [
+            {'DBInstanceIdentifier': db, 'DBInstanceStatus': states[db]}
+            for db in request['Filters'][0]['Values']]}
+
+    def describe_auto_scaling_groups(self, **request):
+        self.requests.append(('describe_auto_scaling_groups', request))
+        return {'AutoScalingGroups': [
+            {'AutoScalingGroupName': name,
+             'Instances': [{'InstanceId': i} for i in self._groups[name]]}
+            for name in request['AutoScalingGroupNames']]}
+
+
+def test_wait_for_resources():
+    client = _FakeResourceClient(
+        ec2_states=[{'i-1': 'stopping', 'i-2': 'pending'},
+                    {'i-1': 'stopped', 'i-2': 'running'}],
+        rds_states=[{'db1': 'starting'}, {'db1': 'starting'},
+                    {'db1': 'available'}])
+    awsclient = Bunch(get_client=lambda service: client)
+    poll_interval = Bunch(update=lambda: 0)
+
+    wait_for_resources(awsclient, {
+        'instance_stopped': ['i-1'],
+        'instance_running': ['i-2'],
+        'instance_terminated': ['i-3'],  # already gone
+        'db_instance_available': ['db1']
+    }, poll_interval=poll_interval)
+    # one describe call per service and round
+    assert [r[0] for r in client.requests] == [
+        'describe_instances', 'describe_db_instances',
+        'describe_instances', 'describe_instance_status',
+        'describe_db_instances',
+        'describe_db_instances']
+
+
+def test_wait_for_resources_timeout():
+    client = _FakeResourceClient(rds_states=[{'db1': 'starting'}])
+    awsclient = Bunch(get_client=lambda service: client)
+    with pytest.raises(Exception) as einfo:
+        wait_for_resources(awsclient, {'db_instance_available': ['db1']},
+                           poll_interval=Bunch(update=lambda: 0.01),
+                           timeout=0.02)
+    assert 'Timeout' in str(einfo.value)
+
+
+def test_get_autoscaling_instances():
+    groups = {'asg-%d' % i: ['i-%d' % i] for i in range(60)}
+    client = _FakeResourceClient(groups=groups)
+    awsclient = Bunch(get_client=lambda service: client)
+
+    asg_instances = _get_autoscaling_instances(awsclient, sorted(groups))
+    assert asg_instances == groups
+    # max. 50 groups per call
+    assert len(client.requests) == 2
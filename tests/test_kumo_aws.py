@@ -13,7 +13,7 @@ from gcdt.kumo_core import load_cloudformation_template, \
     delete_stack, create_change_set, _get_stack_name, describe_change_set, \
     _get_artifact_bucket, _s3_upload, _get_stack_state, delete_change_set, \
     generate_template, wait_for_stack_delete_complete, wait_for_stack_create_complete, \
-    wait_for_stack_update_complete, get_stack_id
+    wait_for_stack_update_complete, get_stack_id, _get_digest
 from gcdt.kumo_start_stop import stop_stack, start_stack, \
     _stop_ec2_instances, _start_ec2_instances
 from gcdt.kumo_util import ensure_ebs_volume_tags_ec2_instance, \
@@ -194,16 +194,17 @@ def test_s3_upload(cleanup_buckets, awsclient):
     artifact_bucket = _get_artifact_bucket(upload_conf)
     prepare_artifacts_bucket(awsclient, artifact_bucket)
     cleanup_buckets.append(artifact_bucket)
-    dest_key = 'kumo/%s/%s-cloudformation.json' % (region,
-                                                   _get_stack_name(upload_conf))
-    expected_s3url = 'https://s3-%s.amazonaws.com/%s/%s' % (region,
-                                                            artifact_bucket,
-                                                            dest_key)
     cloudformation_simple_stack, _ = load_cloudformation_template(
         here('resources/simple_cloudformation_stack/cloudformation.py')
     )
-    actual_s3url = _s3_upload(awsclient, upload_conf,
-                              generate_template({}, upload_conf, cloudformation_simple_stack))
+    template_body = generate_template({}, upload_conf,
+                                      cloudformation_simple_stack)
+    dest_key = 'kumo/%s/%s-%s-cloudformation.json' % (
+        region, _get_stack_name(upload_conf), _get_digest(template_body))
+    expected_s3url = 'https://s3-%s.amazonaws.com/%s/%s' % (region,
+                                                            artifact_bucket,
+                                                            dest_key)
+    actual_s3url = _s3_upload(awsclient, upload_conf, template_body)
     assert expected_s3url == actual_s3url
 
 
@@ -489,13 +490,14 @@ def test_create_update_stack_artifactbucket(awsclient, temp_cloudformation_polic
     artifact_bucket = _get_artifact_bucket(upload_conf)
     prepare_artifacts_bucket(awsclient, artifact_bucket)
     cleanup_buckets.append(artifact_bucket)
-    dest_key = 'kumo/%s/%s-cloudformation.json' % (region,
-                                                   _get_stack_name(upload_conf))
+    template_body = generate_template({}, upload_conf,
+                                      cloudformation_simple_stack)
+    dest_key = 'kumo/%s/%s-%s-cloudformation.json' % (
+        region, _get_stack_name(upload_conf), _get_digest(template_body))
     expected_s3url = 'https://s3-%s.amazonaws.com/%s/%s' % (region,
                                                             artifact_bucket,
                                                             dest_key)
-    actual_s3url = _s3_upload(awsclient, upload_conf,
-                              generate_template({}, upload_conf, cloudformation_simple_stack))
+    actual_s3url = _s3_upload(awsclient, upload_conf, template_body)
     assert expected_s3url == actual_s3url
 
     # create role to use for cloudformation update
@@ -63,7 +63,7 @@ def test_preview_cmd(awsclient, simple_cloudformation_stack,
         awsclient, 'kumo', 'preview',
         config_base_name='gcdt_large',
         location=here('./resources/simple_cloudformation_stack/'))
-    preview_cmd(**tooldata)
+    preview_cmd(False, **tooldata)
     out, err = capsys.readouterr()
     # verify diff results
     assert 'InstanceType │ t2.micro      │ t2.medium ' in out
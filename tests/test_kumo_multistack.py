@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import os
+import threading
+from collections import OrderedDict
+
+import mock
+import pytest
+
+from gcdt.kumo_multistack import find_stack_dirs, add_dependencies, \
+    get_deploy_order, deploy_stacks, _CancellableInterval
+from gcdt.utils import GracefulExit, AdaptiveInterval
+
+from gcdt_testtools.helpers import temp_folder  # fixtures!
+from gcdt_testtools.helpers import Bunch
+
+
+def _stack(name, parameters=None, **stack_config):
+    stack_config['StackName'] = name
+    return {
+        'name': name,
+        'dir': name,
+        'config': {'kumo': {'stack': stack_config,
+                            'parameters': parameters or {}}},
+        'cloudformation': None,
+        'dependencies': set()
+    }
+
+
+def _stacks(*stacks):
+    result = OrderedDict([(s['name'], s) for s in stacks])
+    add_dependencies(result)
+    return result
+
+
+def test_find_stack_dirs(temp_folder):
+    for folder in ['infra/vpc', 'infra/app', 'infra/app/nested', '.hidden',
+                   'docs']:
+        os.makedirs(folder)
+    for folder in ['infra/vpc', 'infra/app', 'infra/app/nested', '.hidden']:
+        open(os.path.join(folder, 'cloudformation.py'), 'w').close()
+
+    assert find_stack_dirs() == ['infra/app', 'infra/vpc']
+
+
+def test_add_dependencies():
+    stacks = _stacks(
+        _stack('vpc'),
+        _stack('db', {'VpcId': 'lookup:stack:vpc:VpcId'}),
+        _stack('app', {'StackName': 'db',
+                       'Subnets': ['lookup:stack:vpc:SubnetA'],
+                       'Other': 'lookup:stack:not-in-this-run:Output'}),
+    )
+    assert stacks['vpc']['dependencies'] == set()
+    assert stacks['db']['dependencies'] == {'vpc'}
+    assert stacks['app']['dependencies'] == {'vpc', 'db'}
+    assert get_deploy_order(stacks) == ['vpc', 'db', 'app']
+
+
+def test_get_deploy_order_circular_dependency():
+    stacks = _stacks(
+        _stack('a', {'B': 'lookup:stack:b:Output'}),
+        _stack('b', {'A': 'lookup:stack:a:Output'}),
+    )
+    with pytest.raises(Exception) as einfo:
+        get_deploy_order(stacks)
+    assert 'Circular dependency' in str(einfo.value)
+
+
+@mock.patch('gcdt.kumo_multistack.deploy_stack')
+def test_deploy_stacks(mocked_deploy_stack):
+    deployed = []
+    lock = threading.Lock()
+
+    def _deploy_stack(awsclient, context, conf, cloudformation,
+                      override_stack_policy=False):
+        with lock:
+            deployed.append(conf['stack']['StackName'])
+        assert context['_event_prefix'] == \
+            '[%s] ' % conf['stack']['StackName']
+        return 1 if conf['stack']['StackName'] == 'db' else 0
+
+    mocked_deploy_stack.side_effect = _deploy_stack
+    stacks = _stacks(
+        _stack('vpc'),
+        _stack('db', {'VpcId': 'lookup:stack:vpc:VpcId'}),
+        _stack('app', {'DbStack': 'db'}),
+        _stack('monitoring'),
+    )
+    awsclient = Bunch(get_client=lambda service: None)
+
+    results = deploy_stacks(awsclient, {}, stacks, concurrency=2)
+    assert results == OrderedDict([
+        ('vpc', 'done'), ('db', 'failed'), ('app', 'skipped'),
+        ('monitoring', 'done')])
+    assert deployed.index('vpc') < deployed.index('db')
+    assert 'app' not in deployed
+
+
+def test_cancellable_interval():
+    cancelled = threading.Event()
+    interval = _CancellableInterval(
+        AdaptiveInterval(min_interval=0.01, max_interval=0.01), cancelled)
+    interval.sleep()
+    cancelled.set()
+    with pytest.raises(GracefulExit):
+        interval.sleep(active=True)
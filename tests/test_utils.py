@@ -13,7 +13,8 @@ from nose.tools import assert_equal
 from gcdt import utils
 from gcdt.utils import retries, \
     get_command, dict_merge, get_env, get_context, flatten, json2table, \
-    fix_old_kumo_config, dict_selective_merge, all_pages
+    fix_old_kumo_config, dict_selective_merge, all_pages, BoundedSet, \
+    AdaptiveInterval
 from gcdt_testtools.helpers import create_tempfile, preserve_env  # fixtures!
 from gcdt_testtools.helpers import logcapture  # fixtures!
 
@@ -343,6 +344,23 @@ def test_all_pages_no_condition():
     assert actual == ['bar1', 'bar2', 'bar3', 'bar4', 'bar5', 'bar']
 
 
+
+def test_all_pages_next_token():
+    # most services use 'NextToken' (ECS uses 'nextToken')
+    pages = {None: ['a', 'b'], 't1': ['c'], 't2': []}
+    tokens = {None: 't1', 't1': 't2'}
+
+    def dummy_method(**kwargs):
+        token = kwargs.get('NextToken')
+        response = {'Items': pages[token]}
+        if token in tokens:
+            response['NextToken'] = tokens[token]
+        return response
+
+    actual = all_pages(dummy_method, {}, lambda r: r['Items'])
+    assert actual == ['a', 'b', 'c']
+
+
 # def all_pages(method, request, accessor, cond=None):
 """Helper to process all pages using botocore service methods (exhausts NextToken).
 note: `cond` is optional... you can use it to make filtering more explicit
@@ -361,3 +379,31 @@ is perfectly fine, too
 
 # TODO get_outputs_for_stack
 # TODO test_make_command
+
+
+def test_bounded_set():
+    seen = BoundedSet(maxlen=3)
+    for i in range(5):
+        seen.add(i)
+    seen.add(4)  # already present, no eviction
+    assert len(seen) == 3
+    assert 0 not in seen
+    assert 1 not in seen
+    assert 2 in seen
+    assert 4 in seen
+
+
+def test_adaptive_interval():
+    interval = AdaptiveInterval(min_interval=1, max_interval=5, backoff=2)
+    assert interval.update(active=True) == 1
+    assert interval.update() == 2
+    assert interval.update() == 4
+    assert interval.update() == 5
+    assert interval.update() == 5
+    assert interval.update(active=True) == 1
+
+
+def test_adaptive_interval_jitter():
+    interval = AdaptiveInterval(min_interval=2, max_interval=2, jitter=0.5)
+    for _ in range(20):
+        assert 1.0 <= interval.update() <= 2.0